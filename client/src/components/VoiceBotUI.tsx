@@ -27,6 +27,34 @@ const VoiceBotUI: React.FC = () => {
   // Audio playback (output)
   const audioContextOutRef = useRef<AudioContext | null>(null);
   const playheadRef = useRef<number>(0);
+  // Server may lower the response rate for slow connections ("audio_format")
+  const outputRateRef = useRef<number>(24000);
+
+  // Transcript bubbles still being written for the current turn
+  const openBubbleRef = useRef<{ user: string | null; assistant: string | null }>({
+    user: null,
+    assistant: null,
+  });
+
+  // ========= Transcripts =========
+
+  const appendTranscript = (role: ChatMessage["role"], text: string) => {
+    if (!text) return;
+    const open = openBubbleRef.current[role];
+    if (open) {
+      setMessages((prev) =>
+        prev.map((m) => (m.id === open ? { ...m, text: m.text + text } : m))
+      );
+    } else {
+      const id = `${role}-${Date.now()}`;
+      openBubbleRef.current[role] = id;
+      setMessages((prev) => [...prev, { id, role, text }]);
+    }
+  };
+
+  const closeTranscripts = () => {
+    openBubbleRef.current = { user: null, assistant: null };
+  };
 
   // ========= Audio Utils =========
 
@@ -89,7 +117,7 @@ const VoiceBotUI: React.FC = () => {
   const playPcm24kFromArrayBuffer = async (buffer: ArrayBuffer) => {
     try {
       const audioCtx = ensureOutputAudioContext();
-      const wavBuffer = pcmToWav(buffer, 24000);
+      const wavBuffer = pcmToWav(buffer, outputRateRef.current);
       const audioBuffer = await audioCtx.decodeAudioData(wavBuffer);
 
       const source = audioCtx.createBufferSource();
@@ -140,11 +168,28 @@ const VoiceBotUI: React.FC = () => {
           if (event.data === "RESPONSE_COMPLETE") {
             console.log("✅ Response complete, ready for next turn");
             setIsProcessing(false);
+            closeTranscripts();
             setStatus("Ready - Tap mic to speak again");
           } else if (event.data === "ERROR") {
             console.error("❌ Server error");
             setIsProcessing(false);
+            closeTranscripts();
             setStatus("Error - Try again");
+          } else if (event.data.startsWith("{")) {
+            const msg = JSON.parse(event.data);
+            if (msg.type === "audio_format" && msg.sampleRate) {
+              outputRateRef.current = msg.sampleRate;
+            } else if (msg.type === "input_transcript") {
+              appendTranscript("user", msg.text);
+            } else if (msg.type === "output_transcript") {
+              // "model_text" repeats the spoken answer, so it is not shown
+              appendTranscript("assistant", msg.text);
+            } else if (msg.type === "turn_skipped") {
+              // Only silence was heard: no answer is coming
+              setIsProcessing(false);
+              closeTranscripts();
+              setStatus("Didn't catch that - Tap mic to speak again");
+            }
           }
         } else {
           const arrayBuffer =
@@ -0,0 +1,111 @@
+import asyncio
+import collections
+import os
+import time
+from typing import Deque
+
+from .metrics import (
+    ADMISSION_INFLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+
+
+# ---------------------------------------------------------------------
+#   ADMISSION SETTINGS
+# ---------------------------------------------------------------------
+
+MAX_INFLIGHT_TURNS = int(os.environ.get("MAX_INFLIGHT_TURNS", "64"))
+ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_TIMEOUT_S = float(os.environ.get("ADMISSION_TIMEOUT_S", "10"))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+# ---------------------------------------------------------------------
+#   GLOBAL LIMIT ON IN-FLIGHT GEMINI TURNS
+# ---------------------------------------------------------------------
+
+class AdmissionController:
+    """Caps concurrent upstream turns, with a bounded FIFO wait queue.
+
+    ``try_acquire()`` takes a free slot without waiting. ``acquire()`` waits
+    in line for one and raises ``AdmissionRejected`` straight away when the
+    queue is full (``queue_full``) or after ``timeout`` seconds (``timeout``).
+    A released slot is handed directly to the oldest waiter.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = MAX_INFLIGHT_TURNS,
+        max_queue: int = ADMISSION_QUEUE_SIZE,
+        timeout: float = ADMISSION_TIMEOUT_S,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            self._update_gauges()
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        if self.try_acquire():
+            ADMISSION_WAIT_SECONDS.observe(0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTED.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full")
+
+        started = time.perf_counter()
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._update_gauges()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if fut.done():
+                # The slot was handed over just as we gave up
+                if isinstance(exc, asyncio.CancelledError):
+                    self.release()
+                    raise
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+                self._update_gauges()
+                if isinstance(exc, asyncio.CancelledError):
+                    raise
+                ADMISSION_REJECTED.inc(reason="timeout")
+                raise AdmissionRejected("timeout") from None
+
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)    # slot passes to the waiter as-is
+                self._update_gauges()
+                return
+        self.inflight -= 1
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        ADMISSION_INFLIGHT.set(self.inflight)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
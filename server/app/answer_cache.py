@@ -0,0 +1,300 @@
+import asyncio
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, OrderedDict, Set, Tuple
+
+from .logs import get_logger, log_event
+from .metrics import ANSWER_CACHE_BYTES, ANSWER_CACHE_LOOKUPS
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------------------------
+#   ANSWER CACHE SETTINGS
+# ---------------------------------------------------------------------
+#   Answers are keyed on the caller's question as transcribed by the Live
+#   API, normalized, plus its language and the persona (system instruction
+#   and per-caller context). A hit is replayed through egress instead of
+#   letting the model generate the answer again.
+
+ANSWER_CACHE = os.environ.get("ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_MAX_BYTES = int(os.environ.get("ANSWER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ANSWER_CACHE_TTL_S = float(os.environ.get("ANSWER_CACHE_TTL_S", "86400"))
+# Shorter questions ("yes", "and the second one?") depend on the
+# conversation so far and are never cached
+ANSWER_CACHE_MIN_WORDS = int(os.environ.get("ANSWER_CACHE_MIN_WORDS", "4"))
+# Optional second tier on disk, shared across restarts; empty = memory only
+ANSWER_CACHE_DIR = os.environ.get("ANSWER_CACHE_DIR", "")
+ANSWER_CACHE_DISK_MAX_BYTES = int(os.environ.get("ANSWER_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_NOT_WORD = re.compile(r"[^\w\s]+")
+
+
+def normalize_question(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a transcript."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(_NOT_WORD.sub(" ", text).split())
+
+
+def answer_key(question: str, language: str, persona: str) -> str:
+    return hashlib.sha256(f"{persona}\0{language}\0{question}".encode()).hexdigest()
+
+
+class CachedAnswer:
+    """A complete answer: 24 kHz response PCM and what the model said."""
+
+    def __init__(self, audio: bytes, transcript: str, question: str, language: str, created: float):
+        self.audio = audio
+        self.transcript = transcript
+        self.question = question
+        self.language = language
+        self.created = created
+
+    def expired(self, ttl: float) -> bool:
+        return time.time() - self.created > ttl
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "transcript": self.transcript,
+            "question": self.question,
+            "language": self.language,
+            "created": self.created,
+        }
+
+
+# ---------------------------------------------------------------------
+#   RECORDING ONE ANSWER
+# ---------------------------------------------------------------------
+
+class AnswerRecorder:
+    """Collects the question and answer of one turn from Live server messages.
+
+    ``on_message()`` returns True once, for the message that finishes the
+    input transcription. That is the point to look the answer up. Model
+    output can start while the transcription is still partial, and a
+    prefix of the question must not be used as a key, so a turn whose
+    transcription never finishes is not looked up at all.
+    """
+
+    def __init__(self, max_bytes: int = ANSWER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.reset()
+
+    def reset(self) -> None:
+        self._question: List[str] = []
+        self._answer: List[str] = []
+        self.language = ""
+        self.audio = bytearray()
+        self.asked = False
+        self.overflow = False
+
+    @property
+    def question(self) -> str:
+        return normalize_question("".join(self._question))
+
+    @property
+    def transcript(self) -> str:
+        return "".join(self._answer).strip()
+
+    def key(self, persona: str) -> Optional[str]:
+        question = self.question
+        if len(question.split()) < ANSWER_CACHE_MIN_WORDS:
+            return None
+        return answer_key(question, self.language, persona)
+
+    def on_message(self, response) -> bool:
+        content = getattr(response, "server_content", None)
+        heard = getattr(content, "input_transcription", None)
+        said = getattr(content, "output_transcription", None)
+        data = getattr(response, "data", None)
+
+        if heard is not None:
+            self._question.append(heard.text or "")
+            self.language = self.language or (heard.language_code or "")
+        if said is not None:
+            self._answer.append(said.text or "")
+        if data is not None and not self.overflow:
+            self.audio += data
+            if len(self.audio) > self.max_bytes:
+                self.overflow, self.audio = True, bytearray()
+
+        if self.asked:
+            return False
+        self.asked = bool(getattr(heard, "finished", False))
+        return self.asked
+
+    def answer(self) -> Optional[CachedAnswer]:
+        if self.overflow or not self.audio:
+            return None
+        return CachedAnswer(bytes(self.audio), self.transcript, self.question, self.language, time.time())
+
+
+# ---------------------------------------------------------------------
+#   LRU + TTL CACHE WITH OPTIONAL DISK TIER
+# ---------------------------------------------------------------------
+
+class AnswerCache:
+    """Size-bounded LRU of answers, shared by every call.
+
+    Entries older than ``ttl`` are dropped when looked up. With a
+    ``directory`` every answer is also written there (``<key>.pcm`` and
+    ``<key>.json``) on a worker thread; a memory miss falls back to disk
+    and promotes the entry. The disk tier evicts its oldest entries past
+    ``disk_max_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+        ttl: float = ANSWER_CACHE_TTL_S,
+        directory: str = ANSWER_CACHE_DIR,
+        disk_max_bytes: int = ANSWER_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries: OrderedDict[str, CachedAnswer] = collections.OrderedDict()
+        self.bytes = 0
+
+        # key -> (audio bytes, created) for everything on disk
+        self._disk: Dict[str, Tuple[int, float]] = {}
+        self._disk_bytes = 0
+        self._writes: Set[asyncio.Task] = set()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._scan()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Optional[str], match: str = "exact") -> Optional[CachedAnswer]:
+        if key is None:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expired(self.ttl):
+            self._evict(key)
+            entry = None
+        if entry is None and key in self._disk:
+            entry = await self._load(key)
+            if entry is not None and len(entry.audio) <= self.max_bytes:
+                self._store(key, entry)
+
+        if entry is None:
+            ANSWER_CACHE_LOOKUPS.inc(match=match, result="miss")
+            return None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        ANSWER_CACHE_LOOKUPS.inc(match=match, result="hit")
+        return entry
+
+    def put(self, key: Optional[str], entry: Optional[CachedAnswer]) -> None:
+        if key is None or entry is None or len(entry.audio) > self.max_bytes:
+            return
+        self._store(key, entry)
+        if self.directory:
+            task = asyncio.create_task(self._save(key, entry))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    # --------------------------
+    #   MEMORY TIER
+    # --------------------------
+    def _store(self, key: str, entry: CachedAnswer) -> None:
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = entry
+        self._account(len(entry.audio))
+        while self.bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._account(-len(entry.audio))
+
+    def _account(self, delta: int) -> None:
+        self.bytes += delta
+        ANSWER_CACHE_BYTES.inc(delta)
+
+    # --------------------------
+    #   DISK TIER
+    # --------------------------
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _scan(self) -> None:
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            if ext != ".pcm":
+                continue
+            try:
+                stat = os.stat(self._path(key, "pcm"))
+            except OSError:
+                continue
+            self._disk[key] = (stat.st_size, stat.st_mtime)
+            self._disk_bytes += stat.st_size
+        self._trim_disk()
+
+    async def _load(self, key: str) -> Optional[CachedAnswer]:
+        try:
+            audio, meta = await asyncio.to_thread(self._read, key)
+        except (OSError, ValueError) as e:
+            log_event(logger, "answer_cache_read_failed", logging.WARNING, error=str(e))
+            self._forget(key)
+            return None
+        entry = CachedAnswer(audio, **meta)
+        if entry.expired(self.ttl):
+            self._forget(key)
+            return None
+        return entry
+
+    def _read(self, key: str) -> Tuple[bytes, Dict[str, Any]]:
+        with open(self._path(key, "json")) as f:
+            meta = json.load(f)
+        with open(self._path(key, "pcm"), "rb") as f:
+            return f.read(), meta
+
+    async def _save(self, key: str, entry: CachedAnswer) -> None:
+        try:
+            await asyncio.to_thread(self._write, key, entry)
+        except OSError as e:
+            log_event(logger, "answer_cache_write_failed", logging.WARNING, error=str(e))
+            return
+        if key in self._disk:
+            self._disk_bytes -= self._disk[key][0]
+        self._disk[key] = (len(entry.audio), entry.created)
+        self._disk_bytes += len(entry.audio)
+        self._trim_disk()
+
+    def _write(self, key: str, entry: CachedAnswer) -> None:
+        # Metadata goes last, so a reader never finds it without its audio
+        for ext, data in (("pcm", entry.audio), ("json", json.dumps(entry.meta()).encode())):
+            tmp = self._path(key, ext + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key, ext))
+
+    def _trim_disk(self) -> None:
+        if self._disk_bytes <= self.disk_max_bytes:
+            return
+        for key in sorted(self._disk, key=lambda k: self._disk[k][1]):
+            if self._disk_bytes <= self.disk_max_bytes:
+                break
+            self._forget(key)
+
+    def _forget(self, key: str) -> None:
+        size, _ = self._disk.pop(key, (0, 0.0))
+        self._disk_bytes -= size
+        for ext in ("json", "pcm"):
+            try:
+                os.remove(self._path(key, ext))
+            except OSError:
+                pass
@@ -0,0 +1,230 @@
+import math
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# ---------------------------------------------------------------------
+#   SILENCE TRIMMING SETTINGS
+# ---------------------------------------------------------------------
+
+TRIM_SILENCE = os.environ.get("TRIM_SILENCE", "1") == "1"
+TRIM_THRESHOLD_DB = float(os.environ.get("TRIM_THRESHOLD_DB", "-50"))
+TRIM_PAD_MS = int(os.environ.get("TRIM_PAD_MS", "300"))
+TRIM_BLOCK_MS = 10
+
+INPUT_SAMPLE_RATE = 16000
+INPUT_MIME_TYPE = f"audio/pcm;rate={INPUT_SAMPLE_RATE}"
+
+
+def frame_dbfs(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS level in dBFS of each complete ``frame_len`` block of Int16 samples."""
+    n = len(samples) // frame_len
+    if n == 0:
+        return np.empty(0, dtype=np.float32)
+    blocks = samples[: n * frame_len].reshape(n, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(blocks * blocks, axis=1)) / 32768.0
+    return 20.0 * np.log10(np.maximum(rms, 1e-9))
+
+
+def voiced_bounds(
+    samples: np.ndarray,
+    threshold_db: float = TRIM_THRESHOLD_DB,
+    sample_rate: int = INPUT_SAMPLE_RATE,
+    block_ms: int = TRIM_BLOCK_MS,
+) -> Optional[Tuple[int, int]]:
+    """Sample range ``[start, end)`` spanning every block above ``threshold_db``.
+
+    Returns ``None`` when the whole buffer is silence. A trailing partial block
+    is scored on its own so short buffers are not ignored.
+    """
+    block_len = max(1, sample_rate * block_ms // 1000)
+    levels = frame_dbfs(samples, block_len)
+
+    tail = len(samples) - len(levels) * block_len
+    if tail:
+        levels = np.append(levels, frame_dbfs(samples[-tail:], tail))
+
+    voiced = np.flatnonzero(levels > threshold_db)
+    if len(voiced) == 0:
+        return None
+    return int(voiced[0]) * block_len, min(len(samples), (int(voiced[-1]) + 1) * block_len)
+
+
+def trim_silence(
+    pcm: bytes,
+    threshold_db: float = TRIM_THRESHOLD_DB,
+    pad_ms: int = TRIM_PAD_MS,
+    sample_rate: int = INPUT_SAMPLE_RATE,
+) -> bytes:
+    """Drop leading and trailing silence from Int16 PCM, keeping ``pad_ms`` each side."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    bounds = voiced_bounds(samples, threshold_db, sample_rate)
+    if bounds is None:
+        return b""
+    pad = sample_rate * pad_ms // 1000
+    start, end = max(0, bounds[0] - pad), min(len(samples), bounds[1] + pad)
+    return samples[start:end].tobytes()
+
+
+# ---------------------------------------------------------------------
+#   STREAMING SILENCE TRIMMER
+# ---------------------------------------------------------------------
+
+class SilenceTrimmer:
+    """Streaming version of ``trim_silence`` for one turn of 16 kHz Int16 PCM.
+
+    Leading silence is held back (only the last ``pad_ms`` is kept as
+    pre-roll) until the first voiced chunk. Silent chunks after speech are
+    held until either more speech arrives, in which case they are released,
+    or the turn ends, in which case only ``pad_ms`` of them is kept.
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = TRIM_THRESHOLD_DB,
+        pad_ms: int = TRIM_PAD_MS,
+        sample_rate: int = INPUT_SAMPLE_RATE,
+    ):
+        self.threshold_db = threshold_db
+        self.sample_rate = sample_rate
+        self.pad_bytes = sample_rate * pad_ms // 1000 * 2
+        self.reset()
+
+    def reset(self) -> None:
+        self._held: List[bytes] = []
+        self._held_bytes = 0
+        self.started = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def push(self, chunk: bytes) -> List[bytes]:
+        self.bytes_in += len(chunk)
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        bounds = voiced_bounds(samples, self.threshold_db, self.sample_rate)
+
+        if bounds is None:
+            self._hold(chunk)
+            return []
+
+        if not self.started:
+            # Keep only pad_ms of pre-roll in front of the first voiced sample
+            self.started = True
+            head = b"".join(self._held) + chunk[: bounds[0] * 2]
+            out = [head[-self.pad_bytes:] if self.pad_bytes else b"", chunk[bounds[0] * 2:]]
+        else:
+            out = self._held + [chunk]
+
+        self._held, self._held_bytes = [], 0
+        return self._emit(out)
+
+    def flush(self) -> List[bytes]:
+        """End of turn: release at most ``pad_ms`` of trailing silence."""
+        if not self.started:
+            self._held, self._held_bytes = [], 0
+            return []
+        tail = b"".join(self._held)[: self.pad_bytes]
+        self._held, self._held_bytes = [], 0
+        return self._emit([tail])
+
+    def _hold(self, chunk: bytes) -> None:
+        self._held.append(chunk)
+        self._held_bytes += len(chunk)
+        if self.started:
+            return
+        # Before speech only the newest pad_ms can ever be sent
+        while len(self._held) > 1 and self._held_bytes - len(self._held[0]) >= self.pad_bytes:
+            self._held_bytes -= len(self._held.pop(0))
+
+    def _emit(self, parts: List[bytes]) -> List[bytes]:
+        out = [p for p in parts if p]
+        self.bytes_out += sum(len(p) for p in out)
+        return out
+
+
+# ---------------------------------------------------------------------
+#   STREAMING RESAMPLER
+# ---------------------------------------------------------------------
+
+# Zero crossings of the windowed-sinc filter on each side
+RESAMPLE_ZEROS = 8
+# Rates a client may declare. Arbitrary rates are refused: the filter
+# bank grows with in_rate / gcd(in_rate, 16000).
+INPUT_SAMPLE_RATES = (8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000)
+MAX_INPUT_CHANNELS = 8
+
+
+class StreamingResampler:
+    """Downmixes and resamples interleaved Int16 PCM to ``out_rate`` mono, chunk by chunk.
+
+    A polyphase windowed-sinc filter for the ratio ``up/down`` is built
+    once; each call to ``process()`` evaluates every output sample of the
+    chunk in one vectorized step. Filter history, the output phase and any
+    odd trailing bytes carry over between calls, so chunk boundaries are
+    inaudible.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int = INPUT_SAMPLE_RATE, channels: int = 1):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        g = math.gcd(in_rate, out_rate)
+        self.up, self.down = out_rate // g, in_rate // g
+
+        # Low-pass at the lower of the two Nyquist rates, designed at the
+        # upsampled rate and scaled by ``up`` to undo zero-stuffing
+        factor = max(self.up, self.down)
+        half = RESAMPLE_ZEROS * factor
+        n = np.arange(-half, half + 1)
+        h = np.sinc(n / factor) / factor * np.kaiser(len(n), 8.0) * self.up
+
+        taps = -(-len(h) // self.up)
+        h = np.concatenate([h, np.zeros(taps * self.up - len(h))])
+        # phases[p, j] = h[p + j*up], reversed so row p dots a forward window
+        self._phases = h.reshape(taps, self.up).T[:, ::-1].astype(np.float32).copy()
+        self._taps = taps
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down and self.channels == 1
+
+    def flush(self) -> bytes:
+        """Output the filter still holds back for the end of the stream, then reset."""
+        tail = b"" if self.passthrough else self.process(bytes(2 * self.channels * (self._taps - 1)))
+        self.reset()
+        return tail
+
+    def reset(self) -> None:
+        self._history = np.zeros(self._taps - 1, dtype=np.float32)
+        self._t = 0          # upsampled position of the next output sample
+        self._carry = b""    # bytes of an incomplete sample frame
+
+    def process(self, pcm: bytes) -> bytes:
+        if self.passthrough:
+            return pcm
+
+        frame = 2 * self.channels
+        pcm = self._carry + pcm
+        usable = len(pcm) // frame * frame
+        self._carry = pcm[usable:]
+        if not usable:
+            return b""
+
+        x = np.frombuffer(pcm[:usable], dtype=np.int16).astype(np.float32)
+        if self.channels > 1:
+            x = x.reshape(-1, self.channels).mean(axis=1)
+
+        # Without the leading history the filter would restart each chunk
+        ext = np.concatenate([self._history, x])
+        n_in = len(ext) - self._taps + 1          # windows with a full history
+        count = max(0, -(-(n_in * self.up - self._t) // self.down))
+
+        t = self._t + np.arange(count) * self.down
+        windows = np.lib.stride_tricks.sliding_window_view(ext, self._taps)
+        y = np.einsum("kl,kl->k", self._phases[t % self.up], windows[t // self.up])
+
+        self._t = self._t + count * self.down - n_in * self.up
+        self._history = ext[n_in:]
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16).tobytes()
@@ -0,0 +1,47 @@
+import os
+from typing import Any, AsyncContextManager, Optional, Protocol
+
+
+# ---------------------------------------------------------------------
+#   LIVE BACKEND INTERFACE
+# ---------------------------------------------------------------------
+#   A backend opens Live sessions. The session it yields must offer the
+#   subset of google.genai's AsyncSession used by the server:
+#
+#     await session.send_realtime_input(audio=Blob | activity_start=... | activity_end=...)
+#     await session.send_client_content(turns=..., turn_complete=...)
+#     async for message in session.receive(): ...   # LiveServerMessage
+#     await session.close()
+
+LIVE_BACKEND = os.environ.get("LIVE_BACKEND", "gemini")   # gemini | fake
+
+
+class LiveBackend(Protocol):
+    name: str
+
+    def connect(self, *, model: str, config: dict) -> AsyncContextManager[Any]:
+        ...
+
+
+class GeminiBackend:
+    """The real Gemini Live API through the ``google-genai`` SDK."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        from google import genai
+
+        self.client = genai.Client(api_key=api_key)
+
+    def connect(self, *, model: str, config: dict) -> AsyncContextManager[Any]:
+        return self.client.aio.live.connect(model=model, config=config)
+
+
+def create_backend(name: str = LIVE_BACKEND, api_key: Optional[str] = None) -> LiveBackend:
+    if name == "gemini":
+        return GeminiBackend(api_key=api_key)
+    if name == "fake":
+        from .fake_live import FakeLiveBackend
+
+        return FakeLiveBackend()
+    raise ValueError(f"Unknown LIVE_BACKEND: {name!r}")
@@ -0,0 +1,812 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Callable, Optional, Union
+
+from fastapi import WebSocket, WebSocketDisconnect
+from google.genai import types
+
+from .admission import AdmissionController, AdmissionRejected
+from .answer_cache import AnswerCache, AnswerRecorder, CachedAnswer
+from .audio import (
+    INPUT_MIME_TYPE,
+    INPUT_SAMPLE_RATE,
+    INPUT_SAMPLE_RATES,
+    MAX_INPUT_CHANNELS,
+    TRIM_SILENCE,
+    SilenceTrimmer,
+    StreamingResampler,
+)
+from .canned import CANNED_GREETING, CannedAudio
+from .decode import StreamDecoder, decoder_available, parse_input_format
+from .egress import Egress, negotiate_codec
+from .filler import FILLER_AUDIO, Filler
+from .live_session import LiveSessionManager
+from .logs import get_logger, log_event
+from .metrics import (
+    CANCEL_SECONDS,
+    ERRORS,
+    FIRST_BYTE_SECONDS,
+    TURN_BYTES_IN,
+    TURN_BYTES_OUT,
+    TURN_SECONDS,
+    TURNS,
+)
+from .protocol import (
+    FRAMINGS,
+    KIND_AUDIO,
+    KIND_CONTROL,
+    PROTOCOL_VERSION,
+    ProtocolError,
+    msgpack_available,
+    parse_control,
+    parse_text,
+)
+from .semantic_cache import SemanticCache
+from .transcripts import OUTPUT_TRANSCRIPT, TRANSCRIPT_LOG, TranscriptStream
+from .turn_buffer import MAX_TURN_SECONDS, TurnBuffer, TurnBufferPool, pcm_bytes
+from .vad import VAD_ENABLED, EnergyVAD, NO_SPEECH, SPEECH_END, SPEECH_START
+
+# How many times a turn is retried on a fresh Live session when the
+# upstream connection drops before any response audio was sent.
+LIVE_RECONNECT_ATTEMPTS = int(os.environ.get("LIVE_RECONNECT_ATTEMPTS", "1"))
+
+# Forward each microphone frame upstream as soon as it arrives instead of
+# uploading the whole turn after END_TURN.
+STREAMING_INGEST = os.environ.get("STREAMING_INGEST", "1") == "1"
+
+# Start the upstream connect on the first audio frame of a turn, in the
+# background, so it overlaps with the user speaking.
+SPECULATIVE_CONNECT = os.environ.get("SPECULATIVE_CONNECT", "1") == "1"
+# A speculative session still unused after this long is closed again
+SPECULATIVE_TIMEOUT_S = float(os.environ.get("SPECULATIVE_TIMEOUT_S", "5"))
+
+# Buffered turn audio is uploaded in slices of this size (256 ms)
+UPLOAD_SLICE_BYTES = 8192
+# Cached answers are handed to egress in slices of this size (200 ms)
+REPLAY_SLICE_BYTES = 9600
+
+# ---------------------------------------------------------------------
+#   CALL LIMITS
+# ---------------------------------------------------------------------
+#   Each is reported to the client as {"type": "error", "code": ...}.
+#   Turn limits end the turn (it is still answered); frame limits drop
+#   the message; idle and call-length limits close the call.
+
+MAX_TURN_BYTES = int(os.environ.get("MAX_TURN_BYTES", str(16 * 1024 * 1024)))
+MAX_FRAME_BYTES = int(os.environ.get("MAX_FRAME_BYTES", str(1024 * 1024)))
+IDLE_TIMEOUT_S = float(os.environ.get("IDLE_TIMEOUT_S", "120"))
+MAX_CALL_SECONDS = float(os.environ.get("MAX_CALL_SECONDS", "3600"))
+
+logger = get_logger(__name__)
+_call_ids = itertools.count(1)
+
+
+async def send_audio_chunk(session, chunk: Union[bytes, memoryview]) -> None:
+    # The SDK only takes bytes; this is the one copy a turn's audio makes
+    await session.send_realtime_input(
+        audio=types.Blob(data=bytes(chunk), mime_type=INPUT_MIME_TYPE)
+    )
+
+
+class Turn:
+    """Audio collected for one user turn."""
+
+    def __init__(self, audio: TurnBuffer):
+        self.audio = audio
+        self.streamed = 0     # bytes of audio already forwarded to the live session
+        self.received = 0     # raw frames received from the client
+        self.bytes_in = 0
+        self.pcm_bytes = 0    # 16 kHz PCM after decoding/resampling
+        self.trimmed_bytes = 0
+        self.started = 0.0        # perf_counter() at the first frame
+        self.admitted = False     # holds an admission slot
+        self.stream_failed = False
+        self.handed_off = False   # passed to a responder, which releases it
+        self.retired = False      # admission slot and buffer given back
+
+
+# ---------------------------------------------------------------------
+#   FULL-DUPLEX CALL
+# ---------------------------------------------------------------------
+
+class VoiceCall:
+    """One WebSocket call: a reader, a responder and a writer running together.
+
+    The reader keeps consuming the client socket while an answer is being
+    streamed, so new speech or an ``INTERRUPT`` message cancels the in-flight
+    answer (barge-in). Everything sent to the client goes through ``egress``
+    and a single writer task, which lets an interrupt drop queued audio.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        live: LiveSessionManager,
+        build_personalization: Callable[[Optional[str]], str],
+        admission: AdmissionController,
+        answers: Optional[AnswerCache] = None,
+        semantic: Optional[SemanticCache] = None,
+        canned: Optional[CannedAudio] = None,
+    ):
+        self.ws = ws
+        self.live = live
+        self.build_personalization = build_personalization
+        self.admission = admission
+        self.answers = answers
+        self.semantic = semantic
+        self.canned = canned
+        self.call_id = next(_call_ids)
+
+        self.user_name: Optional[str] = None   # Set once from UI
+        self.has_greeted = False               # Greet only on first turn
+        self.language: Optional[str] = None    # as last detected by the Live API
+
+        self.vad: Optional[EnergyVAD] = EnergyVAD() if VAD_ENABLED else None
+        # Listens for the caller talking over an answer, with or without
+        # the turn-ending VAD above
+        self.barge_in = EnergyVAD(no_speech_ms=0)
+        self.trimmer: Optional[SilenceTrimmer] = SilenceTrimmer() if TRIM_SILENCE else None
+        self.decoder: Optional[StreamDecoder] = None   # compressed mic input
+        self.resampler: Optional[StreamingResampler] = None   # non-16 kHz/mono PCM input
+
+        self.egress = Egress(ws, call_id=self.call_id)
+        self.transcripts = TranscriptStream(self.egress)
+        self.responder: Optional[asyncio.Task] = None
+        self.speculation: Optional[asyncio.Task] = None
+        self.filler: Optional[Filler] = None   # masks the wait for an answer
+        self.buffers = TurnBufferPool()
+        self.turn = Turn(self.buffers.take())
+
+        self.started = time.monotonic()
+        self.last_message = self.started
+        self.turns = 0
+        self.bytes_in = 0
+        self.tagged = False    # binary frames carry a kind byte
+
+        # Control message type -> handler
+        self._handlers = {
+            "config": self._on_config,
+            "end_turn": self._on_end_turn,
+            "interrupt": self._on_interrupt,
+            "ping": self._on_ping,
+            "stats": self._on_stats,
+        }
+
+    @property
+    def responding(self) -> bool:
+        return self.responder is not None and not self.responder.done()
+
+    async def run(self) -> None:
+        writer = asyncio.create_task(self.egress.run())
+        watchdog = asyncio.create_task(self._watchdog())
+        try:
+            if CANNED_GREETING:
+                await self._say("greeting")
+            await self._reader()
+        finally:
+            if not self.turn.handed_off:
+                self._retire(self.turn)
+            tasks = [t for t in (self.responder, self.speculation, watchdog, writer) if t is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.transcripts.close()
+            self.egress.close()
+            self.buffers.close()
+            if self.decoder is not None:
+                self.decoder.close()
+
+    def send_json(self, payload: dict) -> None:
+        self.egress.send_text(json.dumps(payload))
+
+    def send_error(self, code: str, **details) -> None:
+        ERRORS.inc(type=code)
+        self.log("call_error", logging.WARNING, code=code, **details)
+        self.send_json({"type": "error", "code": code, **details})
+
+    def log(self, event: str, level: int = logging.INFO, **fields) -> None:
+        log_event(logger, event, level, call=self.call_id, **fields)
+
+    # --------------------------
+    #   READER
+    # --------------------------
+    async def _reader(self) -> None:
+        self._new_turn()
+
+        while True:
+            try:
+                message = await self.ws.receive()
+            except WebSocketDisconnect:
+                self.log("client_disconnected")
+                return
+            self.last_message = time.monotonic()
+
+            msg_type = message.get("type")
+
+            if msg_type == "websocket.disconnect":
+                self.log("client_disconnected")
+                return
+
+            if msg_type != "websocket.receive":
+                continue
+
+            text_data = message.get("text")
+            byte_data = message.get("bytes")
+
+            size = len(text_data or byte_data or "")
+            if size > MAX_FRAME_BYTES:
+                self.send_error("frame_too_large", size=size, limit=MAX_FRAME_BYTES)
+                continue
+
+            try:
+                if text_data:
+                    await self._on_control(parse_text(text_data))
+                elif byte_data:
+                    await self._on_binary(byte_data)
+            except ProtocolError as e:
+                self.send_error("bad_message", reason=e.reason)
+
+    # --------------------------
+    #   CONTROL MESSAGES
+    # --------------------------
+    async def _on_binary(self, byte_data: bytes) -> None:
+        if not self.tagged:
+            await self._on_audio(byte_data)
+            return
+
+        kind = byte_data[0]
+        if kind == KIND_AUDIO:
+            if len(byte_data) > 1:
+                await self._on_audio(byte_data[1:])
+        elif kind == KIND_CONTROL:
+            await self._on_control(parse_control(byte_data[1:]))
+        else:
+            raise ProtocolError(f"unknown frame kind: {kind}")
+
+    async def _on_control(self, data: dict) -> None:
+        await self._handlers[data["type"]](data)
+
+    async def _on_end_turn(self, data: dict) -> None:
+        self.log("end_turn", source="client", chunks=self.turn.received)
+        await self._end_turn()
+
+    async def _on_interrupt(self, data: dict) -> None:
+        await self.interrupt("client")
+
+    async def _on_ping(self, data: dict) -> None:
+        self.send_json({"type": "pong", "id": data.get("id"), "ts": time.time()})
+
+    async def _on_stats(self, data: dict) -> None:
+        self.send_json({
+            "type": "stats",
+            "call": self.call_id,
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "turns": self.turns,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.egress.bytes_out,
+            "frames_out": self.egress.frames_out,
+            "codec": self.egress.codec,
+            "buffered_bytes": self.egress.buffered,
+            "responding": self.responding,
+            "upstream_connected": self.live.connected,
+        })
+
+    async def _on_config(self, data: dict) -> None:
+        # A config that only changes audio settings keeps the name
+        if "userName" in data:
+            self.user_name = data.get("userName")
+            self.live.personalize(self.build_personalization(self.user_name))
+        self.log("config", user_name=self.user_name, v=data.get("v", PROTOCOL_VERSION))
+
+        # Client may opt in/out of server-side VAD
+        if "vad" in data:
+            self.vad = EnergyVAD() if data["vad"] else None
+            self.log("vad_configured", enabled=self.vad is not None)
+
+        # Response codec, from the client's list in preference order
+        if "codecs" in data:
+            codec = negotiate_codec(data["codecs"])
+            self.egress.use_codec(codec)
+            self.log("codec_negotiated", codec=codec, offered=data["codecs"])
+
+        if any(k in data for k in ("inputFormat", "sampleRate", "channels")):
+            await self._configure_input(data)
+
+        if "framing" in data:
+            if data["framing"] not in FRAMINGS:
+                raise ProtocolError(f"unknown framing: {data['framing']!r}")
+            self.tagged = data["framing"] == "tagged"
+            self.send_json({"type": "framing", "framing": data["framing"], "msgpack": msgpack_available()})
+
+    async def _watchdog(self) -> None:
+        # One timer per call instead of a timeout around every receive();
+        # closing the socket ends the reader with a disconnect.
+        deadline = self.started + MAX_CALL_SECONDS
+        while True:
+            await asyncio.sleep(max(0.0, min(self.last_message + IDLE_TIMEOUT_S, deadline) - time.monotonic()))
+            now = time.monotonic()
+            if now >= deadline:
+                await self._close_with_error("call_too_long", limit_s=MAX_CALL_SECONDS)
+                return
+            if now < self.last_message + IDLE_TIMEOUT_S:
+                continue
+            if self.responding:
+                self.last_message = now    # the caller is listening, not idle
+                continue
+            await self._close_with_error("idle_timeout", limit_s=IDLE_TIMEOUT_S)
+            return
+
+    async def _close_with_error(self, code: str, **details) -> None:
+        self.send_error(code, **details)
+        # Let the writer deliver the error before the socket is closed
+        await self.egress.drain(timeout=1.0)
+        await self.ws.close(code=1008)    # policy violation
+
+    async def _on_audio(self, byte_data: bytes) -> None:
+        turn = self.turn
+        if turn.bytes_in + len(byte_data) > MAX_TURN_BYTES:
+            self.send_error("turn_too_large", limit=MAX_TURN_BYTES)
+            self.log("end_turn", source="max_bytes", chunks=turn.received)
+            await self._end_turn()
+            return
+
+        turn.received += 1
+        if turn.received == 1:
+            # Not when the turn was created: that includes the wait for
+            # the caller to start talking
+            turn.started = time.perf_counter()
+        turn.bytes_in += len(byte_data)
+        self.bytes_in += len(byte_data)
+        self.log("chunk_received", logging.DEBUG, n=turn.received, size=len(byte_data))
+
+        if SPECULATIVE_CONNECT and turn.received == 1 and not self.live.connected:
+            self._speculate(turn)
+
+        if self.decoder is None:
+            if self.resampler is not None:
+                byte_data = self.resampler.process(byte_data)
+            if byte_data:
+                await self._on_pcm(byte_data)
+            return
+
+        try:
+            pcm = await self.decoder.decode(byte_data)
+        except Exception as e:
+            ERRORS.inc(type="input_decode")
+            self.log("input_decode_failed", logging.WARNING, error=str(e))
+            self.decoder.close()
+            self.decoder = None
+            self.send_json({
+                "type": "input_format", "format": "pcm", "sampleRate": INPUT_SAMPLE_RATE, "channels": 1, "error": "decode_failed",
+            })
+            return
+        if pcm:
+            await self._on_pcm(pcm)
+
+    async def _configure_input(self, data: dict) -> None:
+        value = data.get("inputFormat", "pcm")
+        try:
+            fmt = parse_input_format(str(value))
+        except ValueError:
+            fmt = "pcm"
+        if fmt != "pcm" and not decoder_available():
+            fmt = "pcm"
+
+        # Raw PCM may come at any standard rate and channel count; it is downmixed
+        # and resampled to what Gemini expects
+        rate, channels = data.get("sampleRate", INPUT_SAMPLE_RATE), data.get("channels", 1)
+        if not (
+            rate in INPUT_SAMPLE_RATES
+            and isinstance(channels, int) and 1 <= channels <= MAX_INPUT_CHANNELS
+        ):
+            self.log("input_format_invalid", logging.WARNING, sample_rate=rate, channels=channels)
+            rate, channels = INPUT_SAMPLE_RATE, 1
+        self.resampler = None
+        if fmt == "pcm" and (rate, channels) != (INPUT_SAMPLE_RATE, 1):
+            # Building the filter bank takes a few ms; keep it off the loop
+            self.resampler = await asyncio.to_thread(StreamingResampler, rate, channels=channels)
+
+        # The container header only comes once, so the decoder lives for
+        # the rest of the call
+        if self.decoder is not None and self.decoder.container != fmt:
+            self.decoder.close()
+            self.decoder = None
+        if fmt != "pcm" and self.decoder is None:
+            self.decoder = StreamDecoder(fmt)
+
+        if fmt != "pcm":
+            rate, channels = INPUT_SAMPLE_RATE, 1    # decoder output
+        self.log("input_format", requested=value, format=fmt, sample_rate=rate, channels=channels)
+        self.send_json({"type": "input_format", "format": fmt, "sampleRate": rate, "channels": channels})
+
+    async def _on_pcm(self, byte_data: bytes) -> None:
+        turn = self.turn
+        turn.pcm_bytes += len(byte_data)
+
+        # Leading/trailing silence never leaves the server
+        pieces = self.trimmer.push(byte_data) if self.trimmer is not None else [byte_data]
+
+        # The user started talking over the bot: barge-in. Decided on the
+        # raw frame with the VAD's speech test, since the trimmer also lets
+        # room noise and, when off, plain silence through.
+        if self.responding and SPEECH_START in self.barge_in.process(byte_data):
+            await self.interrupt("barge_in")
+
+        for piece in pieces:
+            turn.audio.append(piece)
+
+        # Stream upstream while the user is still speaking.
+        # Without a free admission slot the turn is buffered and
+        # queues for one at END_TURN instead.
+        if (
+            STREAMING_INGEST
+            and pieces
+            and not turn.stream_failed
+            and (turn.admitted or self._admit_now(turn))
+        ):
+            await self._stream_pending(turn)
+
+        # --------------------------
+        #   SERVER-SIDE VAD
+        # --------------------------
+        if self.vad is not None:
+            events = self.vad.process(byte_data)
+            for event in events:
+                self.send_json({"type": "vad", "event": event})
+
+            if SPEECH_END in events:
+                self.log("end_turn", source="vad", chunks=turn.received)
+                await self._end_turn()
+
+            elif NO_SPEECH in events:
+                # Nobody is talking: drop the buffered silence
+                self.log("no_speech", chunks=turn.received)
+                self.send_json({"type": "turn_skipped", "reason": "no_speech"})
+                self._new_turn()
+                await self.live.drop_speculative()
+
+        # Silence is not buffered, so the duration counts everything received
+        if self.turn is turn and (turn.audio.full or turn.pcm_bytes >= pcm_bytes(MAX_TURN_SECONDS)):
+            self.send_error("turn_too_long", limit_s=MAX_TURN_SECONDS)
+            self.log("end_turn", source="max_duration", chunks=turn.received)
+            await self._end_turn()
+
+    async def _stream_pending(self, turn: Turn) -> None:
+        # While a speculative connect is still running, audio waits in the
+        # turn buffer and is flushed by the first send after it is up.
+        if SPECULATIVE_CONNECT and not self.live.connected:
+            self.live.prefetch()
+            return
+
+        # Chunks are kept so the turn can be replayed if the session
+        # drops; on failure we fall back to uploading the whole turn
+        # after END_TURN.
+        try:
+            session = await self.live.ensure()
+            await self._send_pending(session, turn)
+        except Exception as e:
+            self.log("streaming_ingest_failed", logging.WARNING, error=str(e))
+            await self.live.reset()
+            turn.streamed = 0
+            turn.stream_failed = True
+
+    async def _send_pending(self, session, turn: Turn) -> None:
+        # Automatic activity detection is off, so the turn is bracketed
+        # explicitly: the first chunk on a session opens it, END_TURN
+        # closes it with activity_end.
+        if turn.streamed == 0 and turn.audio:
+            await session.send_realtime_input(activity_start=types.ActivityStart())
+        while turn.streamed < len(turn.audio):
+            piece = turn.audio.view(turn.streamed, turn.streamed + UPLOAD_SLICE_BYTES)
+            await send_audio_chunk(session, piece)
+            turn.streamed += len(piece)
+            self.log("chunk_sent", logging.DEBUG, sent=turn.streamed, total=len(turn.audio))
+
+    def _speculate(self, turn: Turn) -> None:
+        self.live.prefetch()
+        if self.speculation is not None:
+            self.speculation.cancel()
+        self.speculation = asyncio.create_task(self._expire_speculation(turn))
+
+    async def _expire_speculation(self, turn: Turn) -> None:
+        await asyncio.sleep(SPECULATIVE_TIMEOUT_S)
+        # Still the same turn and the caller has said nothing yet
+        if self.turn is turn and not turn.audio:
+            await self.live.drop_speculative()
+
+    # --------------------------
+    #   TURN BOUNDARIES
+    # --------------------------
+    def _admit_now(self, turn: Turn) -> bool:
+        turn.admitted = self.admission.try_acquire()
+        return turn.admitted
+
+    def _release(self, turn: Turn) -> None:
+        if turn.admitted:
+            turn.admitted = False
+            self.admission.release()
+
+    def _retire(self, turn: Turn) -> None:
+        # Runs from several places (and from the responder's done
+        # callback), so only the first call counts
+        if not turn.retired:
+            turn.retired = True
+            self._release(turn)
+            self.buffers.give(turn.audio)
+
+    def _new_turn(self) -> None:
+        if not self.turn.handed_off:
+            self._retire(self.turn)
+        self.turn = Turn(self.buffers.take())
+        if self.vad is not None:
+            self.vad.reset()
+        if self.trimmer is not None:
+            self.trimmer.reset()
+        self.log("waiting_for_audio", logging.DEBUG)
+
+    async def _end_turn(self) -> None:
+        turn = self.turn
+
+        if self.trimmer is not None:
+            for piece in self.trimmer.flush():
+                turn.audio.append(piece)
+            turn.trimmed_bytes = self.trimmer.bytes_in - self.trimmer.bytes_out
+
+        turn.handed_off = True
+        self._new_turn()
+
+        if not turn.audio:
+            self._retire(turn)
+            self.log("turn_skipped", chunks=turn.received, reason="no_audio")
+            # Nothing will be answered; the client still waits for an end
+            self.send_json({"type": "turn_skipped", "reason": "no_audio"})
+            await self.live.drop_speculative()
+            return
+
+        if self.responding:
+            await self.interrupt("new_turn")
+
+        self.turns += 1
+        self.barge_in.reset()
+        self.responder = asyncio.create_task(self._respond(turn))
+        # Not in _respond's finally: a task cancelled before its first step
+        # never runs it
+        self.responder.add_done_callback(lambda _: self._retire(turn))
+
+    # --------------------------
+    #   BARGE-IN
+    # --------------------------
+    async def interrupt(self, reason: str) -> None:
+        if not self.responding:
+            return
+
+        started = time.perf_counter()
+
+        task, self.responder = self.responder, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Drop response audio that is queued but not yet written
+        dropped = self.egress.drop_audio()
+
+        cancel_ms = (time.perf_counter() - started) * 1000
+        CANCEL_SECONDS.observe(cancel_ms / 1000)
+        self.log("interrupted", reason=reason, cancel_ms=round(cancel_ms, 2), dropped=dropped)
+        self.send_json({"type": "interrupted", "reason": reason, "cancel_ms": round(cancel_ms, 1)})
+
+        # The Live API has no "stop generating" call: closing the session is
+        # what cancels the upstream answer. The next turn reconnects.
+        await self.live.reset()
+
+    # -----------------------------------------------------------------
+    #   GEMINI LIVE TURN (session reused across turns)
+    # -----------------------------------------------------------------
+    async def _respond(self, turn: Turn) -> None:
+        response_chunks = 0
+        bytes_out = 0
+        attempt = 0
+        first_byte_ms: Optional[float] = None
+        end_of_turn = time.perf_counter()
+        frames_before = self.egress.frames_out
+        outcome = "ok"
+        recorder = AnswerRecorder() if self.answers is not None else None
+        cached: Optional[CachedAnswer] = None
+
+        self.transcripts.new_turn()
+
+        try:
+            self._start_filler()
+
+            # Global cap on concurrent upstream turns
+            if not turn.admitted:
+                await self.admission.acquire()
+                turn.admitted = True
+            while True:
+                try:
+                    session = await self.live.ensure()
+                    # The session is reused across turns, so a later turn's
+                    # answer may depend on earlier ones: only context-free
+                    # turns are looked up or stored
+                    if not self.live.fresh:
+                        recorder = None
+
+                    # Send whatever was not already streamed
+                    await self._send_pending(session, turn)
+                    await session.send_realtime_input(activity_end=types.ActivityEnd())
+
+                    # Stream Gemini response
+                    go_away = False
+                    if recorder is not None:
+                        recorder.reset()
+                    async for response in session.receive():
+                        self.transcripts.on_message(response)
+
+                        # Look the answer up as soon as the question is known
+                        if recorder is not None and recorder.on_message(response):
+                            cached = await self._lookup_answer(recorder)
+                            if cached is not None:
+                                break
+
+                        if getattr(response, "data", None) is not None:
+                            if first_byte_ms is None:
+                                first_byte_ms = (time.perf_counter() - end_of_turn) * 1000
+                            await self._send_audio(response.data)
+                            response_chunks += 1
+                            bytes_out += len(response.data)
+                            self.log("response_chunk", logging.DEBUG, n=response_chunks, size=len(response.data))
+
+                        if getattr(response, "go_away", None) is not None:
+                            go_away = True
+
+                        if getattr(getattr(response, "server_content", None), "turn_complete", False):
+                            break
+
+                    self.live.answered += 1
+                    # Upstream asked us to leave, or is still generating an
+                    # answer we already have: reconnect before next turn
+                    if go_away or cached is not None:
+                        await self.live.reset()
+                    break
+
+                except Exception as e:
+                    await self.live.reset()
+                    turn.streamed = 0
+                    # Only replay the turn if the caller heard nothing yet
+                    if response_chunks or attempt >= LIVE_RECONNECT_ATTEMPTS:
+                        raise
+                    attempt += 1
+                    self.log("live_reconnect", logging.WARNING, attempt=attempt, error=str(e))
+                    await self._say("reconnecting")
+
+            self.language = self.transcripts.language or self.language
+            if cached is not None:
+                first_byte_ms = (time.perf_counter() - end_of_turn) * 1000
+                self.transcripts.add(OUTPUT_TRANSCRIPT, cached.transcript, final=True)
+                self.transcripts.flush()
+                await self._play(cached.audio)
+                bytes_out += len(cached.audio)
+            elif recorder is not None:
+                self._store_answer(recorder)
+
+            self.has_greeted = True  # Greeting done
+            await self._stop_filler()
+            await self.egress.flush()
+            self.transcripts.flush()
+            self.egress.send_text("RESPONSE_COMPLETE")
+
+        except asyncio.CancelledError:
+            outcome = "interrupted"
+            raise
+
+        except AdmissionRejected as e:
+            outcome = "busy"
+            ERRORS.inc(type="busy")
+            self.log("admission_rejected", logging.WARNING, reason=e.reason)
+            self.send_json({"type": "busy", "reason": e.reason})
+            await self._say("busy")
+            await self._stop_filler()
+            self.transcripts.flush()
+            # Legacy clients only understand the plain ERROR marker
+            self.egress.send_text("ERROR")
+
+        except Exception as e:
+            outcome = "error"
+            ERRORS.inc(type=type(e).__name__)
+            self.log("gemini_error", logging.ERROR, error=str(e))
+            await self._say("error")
+            await self._stop_filler()
+            await self.egress.flush()
+            self.transcripts.flush()
+            self.egress.send_text("ERROR")
+
+        finally:
+            await self._stop_filler()
+            self.transcripts.flush()
+            turn_seconds = time.perf_counter() - turn.started
+            TURNS.inc(outcome=outcome)
+            TURN_SECONDS.observe(turn_seconds, outcome=outcome)
+            TURN_BYTES_IN.observe(turn.bytes_in)
+            TURN_BYTES_OUT.observe(bytes_out)
+            if first_byte_ms is not None:
+                FIRST_BYTE_SECONDS.observe(first_byte_ms / 1000)
+
+            # One summary line per turn instead of one line per chunk
+            self.log(
+                "turn_summary",
+                outcome=outcome,
+                chunks_in=turn.received,
+                bytes_in=turn.bytes_in,
+                bytes_trimmed=turn.trimmed_bytes,
+                chunks_out=response_chunks,
+                bytes_out=bytes_out,
+                frames_out=self.egress.frames_out - frames_before,
+                reconnects=attempt,
+                cached=cached is not None,
+                first_byte_ms=None if first_byte_ms is None else round(first_byte_ms, 1),
+                turn_ms=round(turn_seconds * 1000, 1),
+            )
+            if TRANSCRIPT_LOG:
+                self.log(
+                    "turn_transcript",
+                    language=self.transcripts.language,
+                    question="".join(self.transcripts.heard),
+                    answer=cached.transcript if cached is not None else "".join(self.transcripts.said),
+                )
+
+    async def _lookup_answer(self, recorder: AnswerRecorder) -> Optional[CachedAnswer]:
+        key = recorder.key(self.live.persona)
+        cached = await self.answers.get(key)
+        # Paraphrases of an earlier question, for questions long enough to cache
+        if cached is None and key is not None and self.semantic is not None:
+            similar = await self.semantic.find(recorder.question, self.live.persona, recorder.language)
+            if similar is not None:
+                cached = await self.answers.get(similar, match="semantic")
+        return cached
+
+    def _store_answer(self, recorder: AnswerRecorder) -> None:
+        key, answer = recorder.key(self.live.persona), recorder.answer()
+        if key is None or answer is None:
+            return
+        self.answers.put(key, answer)
+        if self.semantic is not None:
+            self.semantic.add(recorder.question, self.live.persona, recorder.language, key)
+
+    async def _say(self, name: str) -> None:
+        """Play a pre-rendered utterance, if there is one, as its own answer."""
+        clip = self.canned.get(name, self.language) if self.canned is not None else None
+        if clip is not None:
+            await self._play(clip)
+            await self.egress.flush()
+            self.log("canned_played", name=name, language=self.language)
+
+    async def _play(self, audio: Union[bytes, memoryview]) -> None:
+        # Paced by the client's reads, like an answer streamed from upstream
+        audio = memoryview(audio)
+        for start in range(0, len(audio), REPLAY_SLICE_BYTES):
+            await self.egress.wait_writable()
+            await self._send_audio(audio[start:start + REPLAY_SLICE_BYTES])
+
+    # --------------------------
+    #   FILLER
+    # --------------------------
+    def _start_filler(self) -> None:
+        clip = self.canned.get("filler", self.language) if FILLER_AUDIO and self.canned is not None else None
+        if clip is not None:
+            self.filler = Filler(clip)
+            self.filler.start(self.egress)
+
+    async def _stop_filler(self) -> None:
+        if self.filler is not None:
+            filler, self.filler = self.filler, None
+            await filler.stop()
+
+    async def _send_audio(self, data: Union[bytes, memoryview]) -> None:
+        # The first audio of an answer takes over from a playing filler
+        if self.filler is not None:
+            filler, self.filler = self.filler, None
+            data = await filler.crossfade(data)
+        await self.egress.send_audio(data)
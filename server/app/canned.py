@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import mmap
+import os
+from typing import Dict, List, Optional, Tuple
+
+from google.genai import types
+
+from .filler import FILLER_AUDIO
+from .live_session import close_session, open_session
+from .logs import get_logger, log_event
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------------------------
+#   CANNED UTTERANCE SETTINGS
+# ---------------------------------------------------------------------
+#   Short fixed utterances are rendered once by the Live backend into
+#   <CANNED_AUDIO_DIR>/<backend>/<model>/<language>/<name>.pcm (24 kHz mono
+#   Int16) and then memory-mapped, so calls can play them without waiting
+#   for a model. Keying by backend and model means test tones from the fake
+#   backend, or clips in an old model's voice, are never played.
+
+CANNED_AUDIO = os.environ.get("CANNED_AUDIO", "1") == "1"
+CANNED_AUDIO_DIR = os.environ.get("CANNED_AUDIO_DIR", "canned_audio")
+# Render missing clips in the background at startup. Off by default: every
+# worker would render them against the live model at boot. Render them
+# once ahead of time with `python -m app.canned` instead.
+CANNED_RENDER_AT_STARTUP = os.environ.get("CANNED_RENDER_AT_STARTUP", "0") == "1"
+CANNED_DEFAULT_LANGUAGE = os.environ.get("CANNED_DEFAULT_LANGUAGE", "en")
+# Play the greeting as soon as a call connects
+CANNED_GREETING = os.environ.get("CANNED_GREETING", "0") == "1"
+
+# Language code -> name used in the rendering prompt
+CANNED_LANGUAGES = {
+    "en": "English",
+    "hi": "Hindi",
+    "mr": "Marathi",
+    "gu": "Gujarati",
+    "ta": "Tamil",
+    "kn": "Kannada",
+}
+
+CANNED_UTTERANCES = {
+    "greeting": "Hi, I'm your AWS help bot. What would you like to know?",
+    "error": "Sorry, something went wrong on my side. Please ask again.",
+    "busy": "I'm helping a lot of people right now. Please try again in a moment.",
+    "reconnecting": "One moment, I'm reconnecting.",
+    "filler": "Okay, let me check that for you.",
+}
+
+RENDER_INSTRUCTION = (
+    "You are a voice prompt recorder. Say exactly the sentence you are given, "
+    "in the language you are asked for, in a friendly and calm voice. "
+    "Do not add, answer or explain anything."
+)
+
+
+def enabled_utterances() -> List[str]:
+    """Utterances that an enabled feature can play; only these are rendered."""
+    off = set()
+    if not CANNED_GREETING:
+        off.add("greeting")
+    if not FILLER_AUDIO:
+        off.add("filler")
+    return [name for name in CANNED_UTTERANCES if name not in off]
+
+
+def language_of(code: Optional[str]) -> str:
+    """``"hi"`` from ``"hi-IN"``; the default language for unknown codes."""
+    primary = (code or "").split("-", 1)[0].lower()
+    return primary if primary in CANNED_LANGUAGES else CANNED_DEFAULT_LANGUAGE
+
+
+# ---------------------------------------------------------------------
+#   RENDERING
+# ---------------------------------------------------------------------
+
+async def render(backend, model: str, text: str, language: str) -> bytes:
+    """One utterance as 24 kHz PCM, spoken by a fresh Live session."""
+    config = {"response_modalities": ["AUDIO"], "system_instruction": RENDER_INSTRUCTION}
+    prompt = f"Say this in {CANNED_LANGUAGES[language]}: {text}"
+
+    cm, session = await open_session(backend, model, config)
+    try:
+        await session.send_client_content(
+            turns=types.Content(role="user", parts=[types.Part(text=prompt)]),
+            turn_complete=True,
+        )
+        audio = bytearray()
+        async for response in session.receive():
+            if getattr(response, "data", None) is not None:
+                audio += response.data
+            if getattr(getattr(response, "server_content", None), "turn_complete", False):
+                break
+        return bytes(audio)
+    finally:
+        await close_session(cm)
+
+
+# ---------------------------------------------------------------------
+#   CATALOGUE
+# ---------------------------------------------------------------------
+
+class CannedAudio:
+    """Memory-mapped clips for every (utterance, language) pair on disk.
+
+    ``get()`` falls back to the default language and returns ``None`` for
+    clips that have not been rendered, so callers can always just skip
+    the audio. ``start()`` renders what is missing in the background.
+    """
+
+    def __init__(self, backend, model: str, directory: str = CANNED_AUDIO_DIR):
+        self.backend = backend
+        self.model = model
+        self.directory = os.path.join(directory, backend.name, model.replace("/", "_"))
+        self._clips: Dict[Tuple[str, str], memoryview] = {}
+        self._maps: List[mmap.mmap] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _path(self, name: str, language: str) -> str:
+        return os.path.join(self.directory, language, f"{name}.pcm")
+
+    def get(self, name: str, language: Optional[str] = None) -> Optional[memoryview]:
+        clip = self._clips.get((name, language_of(language)))
+        if clip is None:
+            clip = self._clips.get((name, CANNED_DEFAULT_LANGUAGE))
+        return clip
+
+    def load(self) -> int:
+        for language in CANNED_LANGUAGES:
+            for name in enabled_utterances():
+                if (name, language) not in self._clips:
+                    self._map(name, language)
+        return len(self._clips)
+
+    def _map(self, name: str, language: str) -> None:
+        try:
+            with open(self._path(name, language), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return    # not rendered yet, or empty
+        self._maps.append(mm)
+        self._clips[(name, language)] = memoryview(mm)
+
+    def missing(self) -> List[Tuple[str, str]]:
+        return [
+            (name, language)
+            for language in CANNED_LANGUAGES
+            for name in enabled_utterances()
+            if not os.path.exists(self._path(name, language))
+        ]
+
+    async def render_missing(self) -> None:
+        for name, language in self.missing():
+            try:
+                pcm = await render(self.backend, self.model, CANNED_UTTERANCES[name], language)
+            except Exception as e:
+                log_event(logger, "canned_render_failed", logging.WARNING, name=name, language=language, error=str(e))
+                continue
+            if not pcm:
+                log_event(logger, "canned_render_failed", logging.WARNING, name=name, language=language, error="no audio")
+                continue
+            path = self._path(name, language)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(pcm)
+            os.replace(path + ".tmp", path)
+            self._map(name, language)
+            log_event(logger, "canned_rendered", name=name, language=language, bytes=len(pcm))
+
+    def start(self, render_missing: bool = CANNED_RENDER_AT_STARTUP) -> None:
+        log_event(logger, "canned_loaded", clips=self.load(), directory=self.directory)
+        if render_missing and self.missing():
+            self._task = asyncio.create_task(self.render_missing())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    # Render every missing clip ahead of time, e.g. in a container build
+    from .main import MODEL_ID, backend
+
+    catalogue = CannedAudio(backend, MODEL_ID)
+    asyncio.run(catalogue.render_missing())
+    print(f"{catalogue.load()} clips in {catalogue.directory}")
@@ -0,0 +1,152 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import List, Optional, Union
+
+from .audio import INPUT_SAMPLE_RATE
+from .metrics import INPUT_DECODE_SECONDS
+
+try:
+    import av
+except ImportError:  # optional dependency: only raw PCM input is accepted
+    av = None
+
+
+# ---------------------------------------------------------------------
+#   INPUT FORMATS
+# ---------------------------------------------------------------------
+
+# Client-facing name -> FFmpeg demuxer
+INPUT_CONTAINERS = {"webm": "matroska", "ogg": "ogg"}
+
+
+def parse_input_format(value: str) -> str:
+    """``pcm``, ``webm`` or ``ogg`` from a format name or a MediaRecorder MIME type.
+
+    ``"audio/webm;codecs=opus"`` and ``"webm"`` both give ``"webm"``.
+    Raises ``ValueError`` for anything else.
+    """
+    name = value.split(";", 1)[0].strip().lower()
+    name = name.split("/", 1)[1] if name.startswith("audio/") else name
+    if name == "pcm" or name in INPUT_CONTAINERS:
+        return name
+    raise ValueError(f"unsupported input format: {value!r}")
+
+
+def decoder_available() -> bool:
+    return av is not None
+
+
+# ---------------------------------------------------------------------
+#   STREAMING DECODER
+# ---------------------------------------------------------------------
+
+_SYNC = object()     # marks a point in the input; see StreamDecoder.decode()
+
+
+class _Reader:
+    """Blocking file-like object PyAV reads the incoming stream from."""
+
+    def __init__(self, decoder: "StreamDecoder"):
+        self._decoder = decoder
+        self._buf = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while not self._buf:
+            item = self._decoder._in.get()
+            if item is None:
+                return b""
+            if item is _SYNC:
+                # The demuxer wants more data: everything fed before this
+                # marker has been decoded and posted to the loop
+                self._decoder._post(self._decoder._resolve_one)
+                continue
+            self._buf += item
+        out = bytes(self._buf[:size])
+        del self._buf[:size]
+        return out
+
+
+class StreamDecoder:
+    """Decodes a compressed microphone stream to 16 kHz mono Int16 PCM.
+
+    FFmpeg (through PyAV) demuxes, decodes and resamples on a dedicated
+    thread, so the event loop never blocks on it. The container arrives in
+    arbitrary slices over the WebSocket; ``decode()`` feeds one slice and
+    returns whatever PCM could be decoded up to the end of it.
+    """
+
+    def __init__(self, container: str, sample_rate: int = INPUT_SAMPLE_RATE):
+        if av is None:
+            raise RuntimeError("Compressed input needs the 'av' package (PyAV)")
+        self.container = container
+        self.sample_rate = sample_rate
+
+        self._loop = asyncio.get_running_loop()
+        self._in: "queue.Queue[Union[bytes, object, None]]" = queue.Queue()
+        self._out: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="input-decoder", daemon=True)
+        self._thread.start()
+
+    async def decode(self, data: bytes) -> bytes:
+        if self._error is not None:
+            raise self._error
+        started = time.perf_counter()
+
+        fut = self._loop.create_future()
+        self._waiters.append(fut)
+        self._in.put(data)
+        self._in.put(_SYNC)
+        await fut
+
+        pcm = b"".join(self._out)
+        self._out.clear()
+        INPUT_DECODE_SECONDS.observe(time.perf_counter() - started)
+        return pcm
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._in.put(None)
+
+    # --------------------------
+    #   DECODER THREAD
+    # --------------------------
+    def _run(self) -> None:
+        try:
+            with av.open(
+                _Reader(self),
+                format=INPUT_CONTAINERS[self.container],
+                options={"probesize": "4096", "analyzeduration": "0"},
+            ) as container:
+                resampler = av.AudioResampler(format="s16", layout="mono", rate=self.sample_rate)
+                for frame in container.decode(audio=0):
+                    for out in resampler.resample(frame):
+                        self._post(self._out.append, out.to_ndarray().tobytes())
+            self._post(self._fail, EOFError("input stream ended"))
+        except Exception as e:
+            self._post(self._fail, e)
+
+    def _post(self, callback, *args) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass    # loop already closed
+
+    def _resolve_one(self) -> None:
+        if self._waiters:
+            fut = self._waiters.pop(0)
+            if not fut.done():
+                fut.set_result(None)
+
+    def _fail(self, error: BaseException) -> None:
+        self._error = error
+        for fut in self._waiters:
+            if not fut.done():
+                fut.set_exception(error)
+        self._waiters.clear()
@@ -0,0 +1,327 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+from typing import Deque, Iterable, List, Optional, Tuple, Union
+
+from fastapi import WebSocket
+
+from .audio import StreamingResampler
+from .logs import get_logger, log_event
+from .metrics import (
+    EGRESS_BUFFERED_BYTES,
+    EGRESS_CODECS,
+    EGRESS_DROPPED_BYTES,
+    EGRESS_FRAME_BYTES,
+    SLOW_CLIENT_EVENTS,
+)
+from .opus import OPUS_BITRATE, OpusEncoder, opus_available
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------------------------
+#   EGRESS SETTINGS
+# ---------------------------------------------------------------------
+
+OUTPUT_SAMPLE_RATE = 24000
+
+# Response audio is re-cut into frames of this many milliseconds
+EGRESS_FRAME_MS = int(os.environ.get("EGRESS_FRAME_MS", "60"))
+# The first frame of an answer goes out as soon as this much is buffered
+EGRESS_FIRST_FRAME_MS = int(os.environ.get("EGRESS_FIRST_FRAME_MS", "20"))
+
+# Unsent response audio per connection (in ms at the codec's full rate)
+# above which the client counts as slow and EGRESS_SLOW_POLICY applies:
+#   pause        stop reading upstream until the client catches up
+#   drop_oldest  discard the oldest queued audio
+#   downgrade    halve the PCM sample rate (client is told via
+#                "audio_format") or the Opus bitrate, then pause if that
+#                is still not enough
+EGRESS_HIGH_WATER_MS = int(os.environ.get("EGRESS_HIGH_WATER_MS", "3000"))
+EGRESS_SLOW_POLICY = os.environ.get("EGRESS_SLOW_POLICY", "pause")
+SLOW_POLICIES = ("pause", "drop_oldest", "downgrade")
+
+DOWNGRADE_SAMPLE_RATE = OUTPUT_SAMPLE_RATE // 2
+
+# Response codecs in server preference order; "pcm" is always available
+EGRESS_CODECS_SUPPORTED = ("opus", "pcm")
+
+
+def negotiate_codec(offered: Iterable[str]) -> str:
+    """First codec from the client's list this server can produce, else ``pcm``."""
+    for codec in offered:
+        if codec == "opus" and opus_available():
+            return codec
+        if codec == "pcm":
+            return codec
+    return "pcm"
+
+
+def frame_bytes(ms: int, sample_rate: int = OUTPUT_SAMPLE_RATE) -> int:
+    """Size of ``ms`` milliseconds of mono Int16 PCM (at least one sample)."""
+    return max(1, sample_rate * ms // 1000) * 2
+
+
+# ---------------------------------------------------------------------
+#   PER-CONNECTION SEND QUEUE
+# ---------------------------------------------------------------------
+
+class Egress:
+    """Everything sent to one client goes through here, in order.
+
+    Response audio is buffered and cut into ``frame_ms`` frames instead of
+    being forwarded fragment by fragment, so the client gets fewer, evenly
+    sized WebSocket messages. The first frame of each answer is only
+    ``first_frame_ms`` long to keep time-to-first-audio low.
+
+    With ``use_codec("opus")`` each frame is encoded to Opus on a worker
+    thread before it is queued; otherwise raw 24 kHz PCM is sent.
+
+    ``buffered`` counts audio bytes handed to the writer and not yet written
+    to the socket. Above ``high_water_ms`` the client is considered slow and
+    ``policy`` decides what happens. A paused producer resumes once half of
+    that has drained, and the client stops counting as slow when nothing is
+    left. Text (control) messages are never limited or dropped.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        frame_ms: int = EGRESS_FRAME_MS,
+        first_frame_ms: int = EGRESS_FIRST_FRAME_MS,
+        high_water_ms: int = EGRESS_HIGH_WATER_MS,
+        policy: str = EGRESS_SLOW_POLICY,
+        call_id: int = 0,
+    ):
+        if policy not in SLOW_POLICIES:
+            raise ValueError(f"EGRESS_SLOW_POLICY must be one of {SLOW_POLICIES}, got {policy!r}")
+
+        self.ws = ws
+        self.frame_ms = frame_ms
+        self.first_frame_ms = min(frame_ms, first_frame_ms)
+        self.high_water_ms = high_water_ms
+        self.policy = policy
+        self.call_id = call_id
+
+        self._queue: Deque[Union[bytes, str]] = collections.deque()
+        self._ready = asyncio.Event()
+        self._empty = asyncio.Event()
+        self._empty.set()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._pending = bytearray()
+        self._first = True
+        self._downgrade_due = False
+        self._encoder: Optional[OpusEncoder] = None
+        # Low-passes and decimates downgraded PCM; its state carries across
+        # fragments so their boundaries stay inaudible
+        self._downsampler: Optional[StreamingResampler] = None
+
+        self.codec = "pcm"
+        self.sample_rate = OUTPUT_SAMPLE_RATE
+        self.buffered = 0
+        self.slow = False
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.bytes_dropped = 0
+
+    @property
+    def frame_size(self) -> int:
+        return frame_bytes(self.first_frame_ms if self._first else self.frame_ms, self.sample_rate)
+
+    @property
+    def high_water(self) -> int:
+        if self._encoder is not None:
+            return OPUS_BITRATE // 8 * self.high_water_ms // 1000
+        return frame_bytes(self.high_water_ms)
+
+    @property
+    def low_water(self) -> int:
+        return self.high_water // 2
+
+    @property
+    def downgraded(self) -> bool:
+        if self._encoder is not None:
+            return self._encoder.bitrate < OPUS_BITRATE
+        return self.sample_rate != OUTPUT_SAMPLE_RATE
+
+    def use_codec(self, codec: str) -> None:
+        """Switch the response codec; announced to the client as ``audio_format``."""
+        self._encoder = OpusEncoder(OUTPUT_SAMPLE_RATE) if codec == "opus" else None
+        self._downsampler = None
+        self.codec = codec
+        self.sample_rate = OUTPUT_SAMPLE_RATE
+        EGRESS_CODECS.inc(codec=codec)
+        self._announce()
+
+    def send_text(self, text: str) -> None:
+        self._queue.append(text)
+        self._empty.clear()
+        self._ready.set()
+
+    async def send_audio(self, data: bytes) -> None:
+        # A new answer to a client that has caught up goes out at full quality
+        if self._first and self.downgraded and self.buffered <= self.low_water:
+            self._set_quality(downgraded=False)
+
+        if self._downsampler is not None:
+            data = self._downsampler.process(data)
+        self._pending += data
+
+        while len(self._pending) >= self.frame_size:
+            size = self.frame_size
+            frame = bytes(self._pending[:size])
+            del self._pending[:size]
+            self._first = False
+            await self._put(frame)
+
+            if self._downgrade_due:
+                self._downgrade_due = False
+                self._set_quality(downgraded=True)
+
+    async def wait_writable(self) -> None:
+        """Wait until the client has read down to the low-water mark.
+
+        For producers faster than real time, such as replayed answers, so
+        they never trip the slow-client policy on their own.
+        """
+        if self.buffered > self.low_water:
+            self._drained.clear()
+            await self._drained.wait()
+
+    async def flush(self) -> None:
+        """End of answer: send the partial frame and start a new answer."""
+        if self._downsampler is not None:
+            self._pending += self._downsampler.flush()
+        if self._pending or (self._encoder is not None and self._encoder.pending):
+            frame = bytes(self._pending)
+            self._pending.clear()
+            await self._put(frame, final=True)
+        self._first = True
+
+    def drop_audio(self) -> int:
+        """Discard buffered and queued audio, keeping text. Returns frames dropped."""
+        self._pending.clear()
+        self._first = True
+        self._downgrade_due = False
+        if self._downsampler is not None:
+            self._downsampler.reset()
+        if self._encoder is not None:
+            # The stream restarts; an encode still running for the cancelled
+            # answer must not share state with the next one
+            self._encoder = OpusEncoder(OUTPUT_SAMPLE_RATE, self._encoder.bitrate)
+        return self._drop_queued(len(self._queue))[0]
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until everything queued has been written; False on timeout."""
+        try:
+            await asyncio.wait_for(self._empty.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def close(self) -> None:
+        EGRESS_BUFFERED_BYTES.dec(self.buffered)
+        self.buffered = 0
+
+    async def run(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._empty.set()
+                    self._ready.clear()
+                    await self._ready.wait()
+
+                item = self._queue.popleft()
+                if isinstance(item, str):
+                    await self.ws.send_text(item)
+                    continue
+
+                # Counted as buffered until the socket has taken it
+                await self.ws.send_bytes(item)
+                self._account(-len(item))
+        finally:
+            self.close()
+
+    # --------------------------
+    #   SLOW CLIENTS
+    # --------------------------
+    async def _put(self, frame: bytes, final: bool = False) -> None:
+        packets: List[bytes] = [frame]
+        if self._encoder is not None:
+            packets = await self._encoder.encode(frame, final)
+
+        for packet in packets:
+            if self.buffered and self.buffered + len(packet) > self.high_water:
+                await self._overflow(len(packet))
+
+            self._queue.append(packet)
+            self._empty.clear()
+            self._account(len(packet))
+            self._ready.set()
+            self.frames_out += 1
+            self.bytes_out += len(packet)
+            EGRESS_FRAME_BYTES.observe(len(packet))
+
+    async def _overflow(self, size: int) -> None:
+        if not self.slow:
+            self.slow = True
+            SLOW_CLIENT_EVENTS.inc(policy=self.policy)
+            log_event(logger, "slow_client", logging.WARNING, call=self.call_id, policy=self.policy, buffered=self.buffered)
+
+        if self.policy == "drop_oldest":
+            while self.buffered + size > self.high_water:
+                frames, nbytes = self._drop_queued(1)
+                if not frames:
+                    break
+                self.bytes_dropped += nbytes
+                EGRESS_DROPPED_BYTES.inc(nbytes)
+            return
+
+        if self.policy == "downgrade" and not self.downgraded:
+            self._downgrade_due = True
+
+        # pause: stop taking upstream audio until the client catches up
+        self._drained.clear()
+        await self._drained.wait()
+
+    def _drop_queued(self, limit: int) -> Tuple[int, int]:
+        """Remove up to ``limit`` of the oldest queued audio frames."""
+        frames = nbytes = 0
+        kept: Deque[Union[bytes, str]] = collections.deque()
+        while self._queue:
+            item = self._queue.popleft()
+            if isinstance(item, bytes) and frames < limit:
+                frames += 1
+                nbytes += len(item)
+            else:
+                kept.append(item)
+        self._queue = kept
+        self._account(-nbytes)
+        return frames, nbytes
+
+    def _account(self, delta: int) -> None:
+        self.buffered += delta
+        EGRESS_BUFFERED_BYTES.inc(delta)
+        if self.buffered <= self.low_water:
+            self._drained.set()
+        if self.buffered == 0:
+            self.slow = False
+
+    def _set_quality(self, downgraded: bool) -> None:
+        if self._encoder is not None:
+            # Opus packets are self-describing: no need to tell the client
+            self._encoder.bitrate = OPUS_BITRATE // 2 if downgraded else OPUS_BITRATE
+        else:
+            self.sample_rate = DOWNGRADE_SAMPLE_RATE if downgraded else OUTPUT_SAMPLE_RATE
+            self._downsampler = None
+            if downgraded:
+                self._downsampler = StreamingResampler(OUTPUT_SAMPLE_RATE, DOWNGRADE_SAMPLE_RATE)
+                self._pending = bytearray(self._downsampler.process(bytes(self._pending)))
+            self._announce()
+        log_event(logger, "egress_quality_changed", call=self.call_id, codec=self.codec, downgraded=downgraded)
+
+    def _announce(self) -> None:
+        self.send_text(json.dumps({"type": "audio_format", "codec": self.codec, "sampleRate": self.sample_rate}))
@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import os
+import random
+from typing import Any, AsyncIterator, Optional
+
+import numpy as np
+from google.genai import types
+
+
+# ---------------------------------------------------------------------
+#   FAKE LIVE BACKEND SETTINGS
+# ---------------------------------------------------------------------
+#   Select with LIVE_BACKEND=fake. Answers are a 24 kHz test tone, so the
+#   whole server can be load-tested offline and without an API key.
+
+FAKE_CONNECT_DELAY_MS = float(os.environ.get("FAKE_CONNECT_DELAY_MS", "150"))
+FAKE_TTFB_MS = float(os.environ.get("FAKE_TTFB_MS", "400"))
+FAKE_ANSWER_SECONDS = float(os.environ.get("FAKE_ANSWER_SECONDS", "3"))
+FAKE_CHUNK_MS = int(os.environ.get("FAKE_CHUNK_MS", "40"))
+# Audio seconds produced per wall-clock second (>1 = faster than real time)
+FAKE_REALTIME_FACTOR = float(os.environ.get("FAKE_REALTIME_FACTOR", "2"))
+FAKE_CONNECT_FAILURE_RATE = float(os.environ.get("FAKE_CONNECT_FAILURE_RATE", "0"))
+FAKE_TURN_FAILURE_RATE = float(os.environ.get("FAKE_TURN_FAILURE_RATE", "0"))
+FAKE_SEED = os.environ.get("FAKE_SEED")
+# Transcripts sent when the session config asks for them
+FAKE_QUESTION = os.environ.get("FAKE_QUESTION", "How do I make an S3 bucket private?")
+FAKE_ANSWER_TEXT = os.environ.get("FAKE_ANSWER_TEXT", "Turn on Block Public Access for the bucket.")
+
+OUTPUT_SAMPLE_RATE = 24000
+OUTPUT_MIME_TYPE = f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}"
+
+
+def tone_chunk(duration_ms: int, freq: float = 440.0, sample_rate: int = OUTPUT_SAMPLE_RATE) -> bytes:
+    t = np.arange(sample_rate * duration_ms // 1000) / sample_rate
+    return (np.sin(2 * np.pi * freq * t) * 3000).astype(np.int16).tobytes()
+
+
+def audio_message(data: bytes) -> types.LiveServerMessage:
+    return types.LiveServerMessage(
+        server_content=types.LiveServerContent(
+            model_turn=types.Content(
+                role="model",
+                parts=[types.Part(inline_data=types.Blob(data=data, mime_type=OUTPUT_MIME_TYPE))],
+            )
+        )
+    )
+
+
+def transcription_message(text: str, output: bool = False) -> types.LiveServerMessage:
+    transcription = types.Transcription(text=text, finished=True)
+    if output:
+        return types.LiveServerMessage(server_content=types.LiveServerContent(output_transcription=transcription))
+    return types.LiveServerMessage(server_content=types.LiveServerContent(input_transcription=transcription))
+
+
+def turn_complete_message() -> types.LiveServerMessage:
+    return types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+
+
+# ---------------------------------------------------------------------
+#   FAKE SESSION
+# ---------------------------------------------------------------------
+
+class FakeLiveSession:
+    """Stand-in for ``google.genai.live.AsyncSession``.
+
+    Audio is accepted and counted; ``activity_end`` or ``audio_stream_end``
+    (or client content with ``turn_complete``) queues a turn, which ``receive()`` answers after
+    the configured time-to-first-byte with tone audio and ``turn_complete``.
+    """
+
+    def __init__(self, backend: "FakeLiveBackend", config: Optional[dict]):
+        self.backend = backend
+        self.config = config or {}
+        self.audio_bytes_in = 0
+        self.closed = False
+        self._turns: "asyncio.Queue[Optional[bool]]" = asyncio.Queue()
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise ConnectionError("fake live session is closed")
+
+    async def send_realtime_input(
+        self,
+        *,
+        audio: Any = None,
+        audio_stream_end: Optional[bool] = None,
+        activity_end: Any = None,
+        **_,
+    ) -> None:
+        self._check_open()
+        if audio is not None:
+            data = audio.get("data") if isinstance(audio, dict) else audio.data
+            self.audio_bytes_in += len(data or b"")
+        if (audio_stream_end or activity_end is not None) and self.audio_bytes_in:
+            self.audio_bytes_in = 0
+            self._turns.put_nowait(True)
+
+    async def send_client_content(self, *, turns: Any = None, turn_complete: bool = True) -> None:
+        self._check_open()
+        if turn_complete:
+            self._turns.put_nowait(True)
+
+    async def receive(self) -> AsyncIterator[types.LiveServerMessage]:
+        self._check_open()
+        b = self.backend
+
+        if await self._turns.get() is None:
+            raise ConnectionError("fake live session is closed")
+
+        if "input_audio_transcription" in self.config:
+            yield transcription_message(b.question)
+
+        await asyncio.sleep(b.ttfb_ms / 1000)
+
+        if "output_audio_transcription" in self.config:
+            yield transcription_message(b.answer_text, output=True)
+
+        n_chunks = max(1, int(b.answer_seconds * 1000 // b.chunk_ms))
+        fail_at = b.rng.randrange(n_chunks) if b.rng.random() < b.turn_failure_rate else None
+        pause = b.chunk_ms / 1000 / b.realtime_factor
+
+        for i in range(n_chunks):
+            if i == fail_at:
+                raise ConnectionError("fake upstream dropped mid-turn")
+            self._check_open()
+            yield audio_message(b.chunk)
+            await asyncio.sleep(pause)
+
+        yield turn_complete_message()
+
+    async def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._turns.put_nowait(None)
+
+
+# ---------------------------------------------------------------------
+#   FAKE BACKEND
+# ---------------------------------------------------------------------
+
+class FakeLiveBackend:
+    """Local Gemini Live stand-in with configurable latency and failures."""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        connect_delay_ms: float = FAKE_CONNECT_DELAY_MS,
+        ttfb_ms: float = FAKE_TTFB_MS,
+        answer_seconds: float = FAKE_ANSWER_SECONDS,
+        chunk_ms: int = FAKE_CHUNK_MS,
+        realtime_factor: float = FAKE_REALTIME_FACTOR,
+        connect_failure_rate: float = FAKE_CONNECT_FAILURE_RATE,
+        turn_failure_rate: float = FAKE_TURN_FAILURE_RATE,
+        seed: Optional[str] = FAKE_SEED,
+        question: str = FAKE_QUESTION,
+        answer_text: str = FAKE_ANSWER_TEXT,
+    ):
+        self.connect_delay_ms = connect_delay_ms
+        self.ttfb_ms = ttfb_ms
+        self.answer_seconds = answer_seconds
+        self.chunk_ms = chunk_ms
+        self.realtime_factor = realtime_factor
+        self.connect_failure_rate = connect_failure_rate
+        self.turn_failure_rate = turn_failure_rate
+        self.rng = random.Random(seed)
+        self.question = question
+        self.answer_text = answer_text
+        self.chunk = tone_chunk(chunk_ms)
+        self.connects = 0
+
+    @contextlib.asynccontextmanager
+    async def connect(self, *, model: str, config: Optional[dict] = None) -> AsyncIterator[FakeLiveSession]:
+        await asyncio.sleep(self.connect_delay_ms / 1000)
+        if self.rng.random() < self.connect_failure_rate:
+            raise ConnectionError("fake connect failure")
+
+        self.connects += 1
+        session = FakeLiveSession(self, config)
+        try:
+            yield session
+        finally:
+            await session.close()
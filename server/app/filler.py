@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from typing import Optional, Union
+
+import numpy as np
+
+from .egress import OUTPUT_SAMPLE_RATE, frame_bytes
+from .metrics import FILLER_CLIPS
+
+
+# ---------------------------------------------------------------------
+#   FILLER SETTINGS
+# ---------------------------------------------------------------------
+#   When the first answer byte takes longer than FILLER_AFTER_MS, a short
+#   canned acknowledgement ("filler") is played in the caller's language
+#   and the answer is crossfaded in where it arrives.
+
+FILLER_AUDIO = os.environ.get("FILLER_AUDIO", "0") == "1"
+FILLER_AFTER_MS = int(os.environ.get("FILLER_AFTER_MS", "800"))
+FILLER_CROSSFADE_MS = int(os.environ.get("FILLER_CROSSFADE_MS", "80"))
+# How far the filler is sent ahead of real time. Only audio not yet sent
+# can be crossfaded, so this is kept short.
+FILLER_LEAD_MS = int(os.environ.get("FILLER_LEAD_MS", "120"))
+FILLER_SLICE_MS = 20
+
+
+class Filler:
+    """Streams one clip at playback speed until the real answer starts.
+
+    ``run()`` waits ``after_ms``, then hands the clip to egress in
+    ``FILLER_SLICE_MS`` slices, never more than ``lead_ms`` ahead of the
+    caller's playback. ``crossfade()`` stops it and blends the part of the
+    clip not yet sent into the start of the answer. Answer and filler stay
+    one continuous stream, so the client needs no special handling.
+
+    ``stop()`` never cancels a slice that is being sent: egress may be
+    encoding it on a worker thread, and the encoder must not be used by
+    the answer at the same time. It lets that send finish first.
+    """
+
+    def __init__(
+        self,
+        clip: Union[bytes, memoryview],
+        after_ms: int = FILLER_AFTER_MS,
+        crossfade_ms: int = FILLER_CROSSFADE_MS,
+        lead_ms: int = FILLER_LEAD_MS,
+    ):
+        self.clip = memoryview(clip)
+        self.after_ms = after_ms
+        self.fade_bytes = frame_bytes(crossfade_ms)
+        self.lead_ms = lead_ms
+        self.pos = 0      # bytes of the clip handed to egress
+        self.task: Optional[asyncio.Task] = None
+        self._sending = False
+        self._stopping = False
+
+    @property
+    def started(self) -> bool:
+        return self.pos > 0
+
+    def start(self, egress) -> None:
+        self.task = asyncio.create_task(self.run(egress))
+
+    async def run(self, egress) -> None:
+        await asyncio.sleep(self.after_ms / 1000)
+        slice_bytes = frame_bytes(FILLER_SLICE_MS)
+        bytes_per_ms = OUTPUT_SAMPLE_RATE * 2 / 1000
+        began = time.monotonic()
+
+        while self.pos < len(self.clip):
+            ahead_ms = self.pos / bytes_per_ms - (time.monotonic() - began) * 1000
+            if ahead_ms > self.lead_ms:
+                await asyncio.sleep((ahead_ms - self.lead_ms) / 1000)
+            piece = self.clip[self.pos:self.pos + slice_bytes]
+            self._sending = True
+            try:
+                await egress.send_audio(piece)
+            finally:
+                self._sending = False
+            self.pos += len(piece)
+            if self._stopping:
+                return
+        FILLER_CLIPS.inc(outcome="finished")
+
+    async def stop(self) -> None:
+        if self.task is not None and not self.task.done():
+            self._stopping = True
+            if not self._sending:
+                self.task.cancel()    # only ever while it waits
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def crossfade(self, head: bytes) -> bytes:
+        """Stop the filler and fade what is left of it out under ``head``."""
+        finished = self.task is not None and self.task.done()
+        await self.stop()
+        if not self.started or finished:
+            return head
+
+        tail = np.frombuffer(self.clip[self.pos:self.pos + self.fade_bytes], dtype=np.int16)
+        n = min(len(tail), len(head) // 2)
+        FILLER_CLIPS.inc(outcome="crossfaded")
+        if n == 0:
+            return head
+
+        mixed = np.frombuffer(head, dtype=np.int16).astype(np.float32)
+        ramp = np.linspace(0.0, 1.0, n, endpoint=False, dtype=np.float32)
+        mixed[:n] = mixed[:n] * ramp + tail[:n] * (1.0 - ramp)
+        return np.clip(np.rint(mixed), -32768, 32767).astype(np.int16).tobytes()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Optional, Tuple
+
+from google.genai import types
+
+from .logs import get_logger, log_event
+from .metrics import ACTIVE_LIVE_SESSIONS, SPECULATIVE_SESSIONS, UPSTREAM_CONNECT_SECONDS
+
+logger = get_logger(__name__)
+
+
+async def open_session(backend, model: str, config: dict) -> Tuple[Any, Any]:
+    """Connect a Live session; returns ``(context_manager, session)``."""
+    started = time.perf_counter()
+    cm = backend.connect(model=model, config=config)
+    session = await cm.__aenter__()
+    UPSTREAM_CONNECT_SECONDS.observe(time.perf_counter() - started)
+    ACTIVE_LIVE_SESSIONS.inc()
+    return cm, session
+
+
+async def close_session(cm) -> None:
+    ACTIVE_LIVE_SESSIONS.dec()
+    try:
+        await cm.__aexit__(None, None, None)
+    except Exception as e:
+        log_event(logger, "live_session_close_failed", logging.WARNING, error=str(e))
+    log_event(logger, "live_session_closed")
+
+
+# ---------------------------------------------------------------------
+#   PER-CALL GEMINI LIVE SESSION
+# ---------------------------------------------------------------------
+
+class LiveSessionManager:
+    """Keeps one Gemini Live session open for the whole WebSocket call.
+
+    The session is opened lazily by ``ensure()`` and reused for every turn.
+    Callers that hit an upstream failure call ``reset()``; the next
+    ``ensure()`` then reconnects. ``close()`` tears it down on disconnect.
+
+    With a ``pool``, new sessions are taken pre-warmed from it. Per-caller
+    context (``personalize()``) is sent as client content on the open
+    session instead of being baked into the system instruction, so it never
+    needs a new connection.
+    """
+
+    def __init__(self, backend, model: str, config: dict, pool=None):
+        self._backend = backend
+        self._model = model
+        self._config = config
+        self._pool = pool
+        self._stale = False
+
+        # Background connect started by prefetch(); the session it opens
+        # stays "speculative" until a turn actually uses it.
+        self._prefetch: Optional[asyncio.Task] = None
+        self._speculative = False
+
+        self._personalization = ""
+        self._sent_personalization = ""
+
+        self._cm: Optional[Any] = None
+        self._session: Optional[Any] = None
+        self._lock = asyncio.Lock()
+
+        self.connects = 0
+        self.pooled = 0
+        self.answered = 0    # turns answered on the current session
+
+    @property
+    def connected(self) -> bool:
+        return self._session is not None
+
+    @property
+    def fresh(self) -> bool:
+        """No earlier turn on this session that an answer could depend on."""
+        return self.answered == 0
+
+    @property
+    def persona(self) -> str:
+        """Everything besides the caller's audio that shapes an answer."""
+        return json.dumps([self._config, self._personalization], sort_keys=True, default=str)
+
+    def configure(self, config: dict) -> None:
+        # A new system instruction only applies to a fresh session, so the
+        # current one is dropped on the next ensure().
+        if config != self._config:
+            self._config = config
+            self._stale = self._session is not None
+
+    def personalize(self, text: str) -> None:
+        # Applied lazily by the next ensure()
+        self._personalization = text
+
+    def prefetch(self) -> None:
+        """Start connecting in the background without waiting for it."""
+        if self._session is None and (self._prefetch is None or self._prefetch.done()):
+            self._prefetch = asyncio.create_task(self._run_prefetch())
+
+    async def _run_prefetch(self) -> None:
+        try:
+            async with self._lock:
+                if self._session is None or self._stale:
+                    await self._close_locked()
+                    await self._open_locked()
+                    self._speculative = True
+        except Exception as e:
+            log_event(logger, "live_prefetch_failed", logging.WARNING, error=str(e))
+
+    async def drop_speculative(self) -> None:
+        """Cancel a pending prefetch and close its session if no turn used it."""
+        if self._prefetch is not None and not self._prefetch.done():
+            self._prefetch.cancel()
+            await asyncio.gather(self._prefetch, return_exceptions=True)
+            SPECULATIVE_SESSIONS.inc(result="cancelled")
+        async with self._lock:
+            if self._speculative:
+                SPECULATIVE_SESSIONS.inc(result="dropped")
+                log_event(logger, "speculative_session_dropped")
+                await self._close_locked()
+
+    async def ensure(self):
+        async with self._lock:
+            if self._session is None or self._stale:
+                await self._close_locked()
+                await self._open_locked()
+            elif self._speculative:
+                SPECULATIVE_SESSIONS.inc(result="used")
+            self._speculative = False
+
+            if self._personalization != self._sent_personalization:
+                await self._session.send_client_content(
+                    turns=types.Content(role="user", parts=[types.Part(text=self._personalization)]),
+                    turn_complete=False,
+                )
+                self._sent_personalization = self._personalization
+
+            return self._session
+
+    async def reset(self) -> None:
+        async with self._lock:
+            await self._close_locked()
+
+    async def close(self) -> None:
+        if self._prefetch is not None and not self._prefetch.done():
+            self._prefetch.cancel()
+            await asyncio.gather(self._prefetch, return_exceptions=True)
+        await self.reset()
+
+    async def _open_locked(self) -> None:
+        taken = None
+        if self._pool is not None and self._pool.config == self._config:
+            taken = self._pool.take()
+
+        if taken is not None:
+            self._cm, self._session = taken
+            self.pooled += 1
+            log_event(logger, "live_session_from_pool", n=self.connects + 1)
+        else:
+            self._cm, self._session = await open_session(self._backend, self._model, self._config)
+            log_event(logger, "live_session_opened", n=self.connects + 1)
+
+        self._stale = False
+        self._sent_personalization = ""
+        self.answered = 0
+        self.connects += 1
+
+    async def _close_locked(self) -> None:
+        self._speculative = False
+        cm, self._cm, self._session = self._cm, None, None
+        if cm is not None:
+            await close_session(cm)
@@ -0,0 +1,123 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+
+# ---------------------------------------------------------------------
+#   LOGGING SETTINGS
+# ---------------------------------------------------------------------
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")          # json | text
+# Per-event sampling, e.g. "chunk_received=0.01,response_chunk=0.1"
+LOG_SAMPLE = os.environ.get("LOG_SAMPLE", "")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+LOGGER_NAME = "voicebot"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ``ts``, ``level``, ``logger``, ``event`` + fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        extra = " ".join(f"{k}={v}" for k, v in fields.items())
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        return f"{stamp} {record.levelname:<7} {record.getMessage()} {extra}".rstrip()
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of records for events listed in ``rates``."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.msg)
+        return rate is None or random.random() < rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread and
+    drops records instead of blocking when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def setup_logging() -> logging.Logger:
+    """Route the ``voicebot`` logger through a queue to a background writer thread.
+
+    The event loop only pays for a ``put_nowait``; formatting and the write
+    to stdout happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(records)
+    handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE)))
+
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{LOGGER_NAME}.{name.rsplit('.', 1)[-1]}")
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields) -> None:
+    """Log a structured event; a no-op (no record built) when the level is off."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
@@ -1,22 +1,44 @@
-import asyncio
+import contextlib
+import logging
 import os
-import json
 from typing import Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
+from .admission import AdmissionController
+from .answer_cache import ANSWER_CACHE, AnswerCache
+from .backend import LIVE_BACKEND, create_backend
+from .call import VoiceCall
+from .canned import CANNED_AUDIO, CannedAudio
+from .live_session import LiveSessionManager
+from .logs import get_logger, log_event, setup_logging
+from .metrics import ACTIVE_WEBSOCKETS, CONTENT_TYPE, ERRORS, render_latest
+from .semantic_cache import SEMANTIC_CACHE, SemanticCache, semantic_available
+from .session_pool import LiveSessionPool
 
 # ---------------------------------------------------------------------
 #   ENV + FASTAPI
 # ---------------------------------------------------------------------
 
-load_dotenv()
+setup_logging()
+logger = get_logger(__name__)
 
-app = FastAPI()
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool.start()
+    if canned is not None:
+        canned.start()
+    try:
+        yield
+    finally:
+        await pool.stop()
+        if canned is not None:
+            await canned.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,13 +49,24 @@ app.add_middleware(
 )
 
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    print("⚠️ WARNING: GOOGLE_API_KEY not set!")
+if not GOOGLE_API_KEY and LIVE_BACKEND == "gemini":
+    log_event(logger, "google_api_key_missing", logging.WARNING)
 
-client = genai.Client(api_key=GOOGLE_API_KEY)
+# Gemini Live by default; LIVE_BACKEND=fake for offline load testing
+backend = create_backend(LIVE_BACKEND, api_key=GOOGLE_API_KEY)
+
+# Shared by every call: caps concurrent upstream turns
+admission = AdmissionController()
+
+# Shared by every call: answers to questions asked before
+answers = AnswerCache() if ANSWER_CACHE else None
+# ... and to questions that mean the same
+semantic = SemanticCache() if answers is not None and SEMANTIC_CACHE and semantic_available() else None
 
 MODEL_ID = "gemini-2.5-flash-native-audio-preview-09-2025"
 
+# Shared by every call: pre-rendered apologies, notices and greeting
+canned = CannedAudio(backend, MODEL_ID) if CANNED_AUDIO else None
 
 
 BASE_SYSTEM_INSTRUCTION = """
@@ -55,6 +88,35 @@ Tone: Friendly, calm, supportive. Act like a senior AWS cloud engineer.
 """
 
 
+def build_live_config() -> dict:
+    return {
+        "response_modalities": ["AUDIO"],
+        "system_instruction": BASE_SYSTEM_INSTRUCTION,
+        # Turns are ended by END_TURN (or our own VAD), not by a pause in
+        # the audio we stream while the caller is still talking
+        "realtime_input_config": {"automatic_activity_detection": {"disabled": True}},
+        # Transcripts key the answer cache
+        "input_audio_transcription": {},
+        "output_audio_transcription": {},
+    }
+
+
+def build_personalization(user_name: Optional[str]) -> str:
+    # Sent as context on the open session, so pooled sessions that share
+    # the base system instruction can still be personalized.
+    if not user_name:
+        return ""
+    return (
+        f"The user's name is {user_name}. "
+        f"Use their name naturally sometimes during explanations. "
+        f"This is context only, do not reply to it."
+    )
+
+
+# Pre-warmed sessions so a new caller's first turn skips the connect
+pool = LiveSessionPool(backend, MODEL_ID, build_live_config())
+
+
 # ---------------------------------------------------------------------
 #   HEALTH CHECK
 # ---------------------------------------------------------------------
@@ -65,141 +127,38 @@ async def health():
 
 
 # ---------------------------------------------------------------------
-#   WEBSOCKET: TURN-BASED AUDIO CHAT WITH PERSONALIZATION
+#   PROMETHEUS METRICS
+# ---------------------------------------------------------------------
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=render_latest(), media_type=CONTENT_TYPE)
+
+
+# ---------------------------------------------------------------------
+#   WEBSOCKET: FULL-DUPLEX AUDIO CHAT WITH PERSONALIZATION
 # ---------------------------------------------------------------------
 
 @app.websocket("/ws/live-audio")
 async def ws_live_audio(ws: WebSocket):
     await ws.accept()
-    print("🔗 WebSocket connected (Turn-based)")
+    ACTIVE_WEBSOCKETS.inc()
+    log_event(logger, "ws_connected")
 
-    user_name: Optional[str] = None   # Set once from UI
-    has_greeted = False               # Greet only on first turn
+    live = LiveSessionManager(backend, MODEL_ID, build_live_config(), pool=pool)
 
     try:
-        while True:
-            audio_chunks = []
-            print("\n🎤 Waiting for user audio...")
-
-            # --------------------------
-            #   RECEIVE LOOP
-            # --------------------------
-            while True:
-                try:
-                    message = await ws.receive()
-                except WebSocketDisconnect:
-                    print("❌ Client disconnected")
-                    return
-
-                msg_type = message.get("type")
-
-                if msg_type == "websocket.disconnect":
-                    print("❌ Client disconnected")
-                    return
-
-                if msg_type != "websocket.receive":
-                    continue
-
-                text_data = message.get("text")
-                byte_data = message.get("bytes")
-
-                # --------------------------
-                #   Handle CONFIG message
-                # --------------------------
-                if text_data:
-                    try:
-                        data = json.loads(text_data)
-                        if data.get("type") == "config":
-                            user_name = data.get("userName")
-                            print(f"🧑 User name set → {user_name}")
-                            continue
-                    except:
-                        pass
-
-                # --------------------------
-                #   END TURN
-                # --------------------------
-                if text_data == "END_TURN":
-                    print(f"✋ End turn ({len(audio_chunks)} chunks)")
-                    break
-
-                # --------------------------
-                #   AUDIO CHUNK
-                # --------------------------
-                if byte_data:
-                    audio_chunks.append(byte_data)
-                    print(f"📥 Received chunk {len(audio_chunks)}")
-
-            if not audio_chunks:
-                print("⚠️ No audio received, skipping turn")
-                continue
-
-            # -----------------------------------------------------------------
-            #   SYSTEM INSTRUCTIONS WITH PERSONALIZATION
-            # -----------------------------------------------------------------
-            if user_name:
-                personalized = (
-                        f"\nThe user's name is {user_name}. "
-                        f"Use their name naturally sometimes during explanations.\n"
-                    )
- 
-
-            final_instruction = BASE_SYSTEM_INSTRUCTION + personalized
-
-            # -----------------------------------------------------------------
-            #   GEMINI LIVE TURN
-            # -----------------------------------------------------------------
-            print("🤖 Sending audio to Gemini...")
-
-            try:
-                async with client.aio.live.connect(
-                    model=MODEL_ID,
-                    config={
-                        "response_modalities": ["AUDIO"],
-                        "system_instruction": final_instruction,
-                    },
-                ) as session:
-                    print("🔗 Gemini Live session started")
-
-                    # Send all audio chunks
-                    for i, chunk in enumerate(audio_chunks):
-                        await session.send_realtime_input(
-                            audio=types.Blob(
-                                data=chunk,
-                                mime_type="audio/pcm;rate=16000"
-                            )
-                        )
-                        print(f"📤 Sent chunk {i+1}/{len(audio_chunks)}")
-
-                    await session.send_realtime_input(audio_stream_end=True)
-                    print("📤 Sent audio_stream_end=True")
-
-                    # Stream Gemini response
-                    response_chunks = 0
-                    async for response in session.receive():
-                        if getattr(response, "data", None) is not None:
-                            await ws.send_bytes(response.data)
-                            response_chunks += 1
-                            print(f"🔊 Sent response chunk {response_chunks}")
-
-                        if getattr(getattr(response, "server_content", None), "turn_complete", False):
-                            print("✅ Gemini turn complete")
-                            break
-
-                has_greeted = True  # Greeting done
-                await ws.send_text("RESPONSE_COMPLETE")
-
-            except Exception as e:
-                print(f"❌ Gemini error: {e}")
-                await ws.send_text("ERROR")
-                continue
+        await VoiceCall(ws, live, build_personalization, admission, answers, semantic, canned).run()
 
     except Exception as e:
-        print(f"❌ Unexpected WebSocket error: {e}")
+        ERRORS.inc(type=type(e).__name__)
+        log_event(logger, "ws_error", logging.ERROR, error=str(e))
 
     finally:
+        ACTIVE_WEBSOCKETS.dec()
+        await live.close()
         try:
             await ws.close()
         except:
             pass
-        print("🔌 WebSocket closed")
+        log_event(logger, "ws_closed")
@@ -0,0 +1,312 @@
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# ---------------------------------------------------------------------
+#   MINIMAL PROMETHEUS PRIMITIVES
+# ---------------------------------------------------------------------
+#   Counters, gauges and histograms rendered in the Prometheus text
+#   exposition format (version 0.0.4). Kept in-process and dependency-free;
+#   every metric registers itself in REGISTRY on creation.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[str, ...]
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self._metrics)
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self) -> str:
+        return f"# HELP {self.name} {self.doc}\n# TYPE {self.name} {self.kind}\n"
+
+    def render(self) -> str:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"{self.name}_total{_labels(self.labelnames, k)} {_fmt(v)}\n" for k, v in items]
+        return self._header() + "".join(lines)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {} if self.labelnames else {(): 0.0}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}\n" for k, v in items]
+        return self._header() + "".join(lines)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, buckets: Sequence[float], labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        super().__init__(name, doc, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: [bucket counts..., sum, count]
+        self._series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines: List[str] = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_fmt(cumulative)}\n")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(series[-2])}\n")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(series[-1])}\n")
+        return self._header() + "".join(lines)
+
+
+def render_latest(registry: Optional[Registry] = None) -> str:
+    return (registry or REGISTRY).render()
+
+
+# ---------------------------------------------------------------------
+#   VOICE BOT METRICS
+# ---------------------------------------------------------------------
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+DURATION_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+CANCEL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+
+FIRST_BYTE_SECONDS = Histogram(
+    "voicebot_first_response_byte_seconds",
+    "Time from end of user turn to the first response audio byte.",
+    LATENCY_BUCKETS,
+)
+UPSTREAM_CONNECT_SECONDS = Histogram(
+    "voicebot_upstream_connect_seconds",
+    "Time to open a Gemini Live session.",
+    LATENCY_BUCKETS,
+)
+TURN_SECONDS = Histogram(
+    "voicebot_turn_duration_seconds",
+    "Duration of a turn from first audio to end of response.",
+    DURATION_BUCKETS,
+    labelnames=("outcome",),
+)
+TURN_BYTES_IN = Histogram(
+    "voicebot_turn_bytes_in",
+    "Microphone bytes received from the client per turn.",
+    BYTES_BUCKETS,
+)
+TURN_BYTES_OUT = Histogram(
+    "voicebot_turn_bytes_out",
+    "Response audio bytes sent to the client per turn.",
+    BYTES_BUCKETS,
+)
+CANCEL_SECONDS = Histogram(
+    "voicebot_interrupt_cancel_seconds",
+    "Time for a barge-in to stop the in-flight answer.",
+    CANCEL_BUCKETS,
+)
+ACTIVE_WEBSOCKETS = Gauge(
+    "voicebot_active_websocket_sessions",
+    "Open client WebSocket connections.",
+)
+ACTIVE_LIVE_SESSIONS = Gauge(
+    "voicebot_active_gemini_sessions",
+    "Open Gemini Live sessions.",
+)
+TURNS = Counter(
+    "voicebot_turns",
+    "Completed turns by outcome.",
+    labelnames=("outcome",),
+)
+ERRORS = Counter(
+    "voicebot_errors",
+    "Errors reported to the client, by type.",
+    labelnames=("type",),
+)
+ADMISSION_INFLIGHT = Gauge(
+    "voicebot_admission_inflight_turns",
+    "Upstream turns currently holding an admission slot.",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "voicebot_admission_queue_depth",
+    "Turns waiting for an admission slot.",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "voicebot_admission_wait_seconds",
+    "Time a turn waited for an admission slot.",
+    (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+)
+ADMISSION_REJECTED = Counter(
+    "voicebot_admission_rejected",
+    "Turns rejected by admission control, by reason.",
+    labelnames=("reason",),
+)
+POOL_IDLE_SESSIONS = Gauge(
+    "voicebot_pool_idle_sessions",
+    "Pre-warmed Gemini Live sessions waiting in the pool.",
+)
+POOL_TAKES = Counter(
+    "voicebot_pool_takes",
+    "Session requests served from the pool (hit) or not (miss).",
+    labelnames=("result",),
+)
+SPECULATIVE_SESSIONS = Counter(
+    "voicebot_speculative_sessions",
+    "Speculative upstream connects by result (used, dropped, cancelled).",
+    labelnames=("result",),
+)
+EGRESS_FRAME_BYTES = Histogram(
+    "voicebot_egress_frame_bytes",
+    "Size of response audio frames written to the client.",
+    (960, 1920, 2880, 3840, 4800, 9600, 19200, 48000),
+)
+EGRESS_BUFFERED_BYTES = Gauge(
+    "voicebot_egress_buffered_bytes",
+    "Response audio queued for clients but not yet written to their sockets.",
+)
+EGRESS_DROPPED_BYTES = Counter(
+    "voicebot_egress_dropped_bytes",
+    "Response audio discarded because a client read too slowly.",
+)
+SLOW_CLIENT_EVENTS = Counter(
+    "voicebot_slow_client_events",
+    "Times a client went over the egress high-water mark, by policy applied.",
+    labelnames=("policy",),
+)
+EGRESS_CODECS = Counter(
+    "voicebot_egress_codec_negotiations",
+    "Response codec chosen for clients that sent a codec list.",
+    labelnames=("codec",),
+)
+OPUS_ENCODE_SECONDS = Histogram(
+    "voicebot_opus_encode_seconds",
+    "Time to encode one response frame to Opus, including the thread hop.",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+INPUT_DECODE_SECONDS = Histogram(
+    "voicebot_input_decode_seconds",
+    "Time to decode one compressed microphone message, including the thread hop.",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+TURN_BUFFER_BYTES = Gauge(
+    "voicebot_turn_buffer_bytes",
+    "Memory allocated for user-turn audio buffers across all calls.",
+)
+ANSWER_CACHE_LOOKUPS = Counter(
+    "voicebot_answer_cache_lookups",
+    "Answer cache lookups by kind of match (exact, semantic) and result (hit, miss).",
+    labelnames=("match", "result"),
+)
+ANSWER_CACHE_BYTES = Gauge(
+    "voicebot_answer_cache_bytes",
+    "Response audio held in the in-memory answer cache.",
+)
+SEMANTIC_CACHE_SEARCHES = Counter(
+    "voicebot_semantic_cache_searches",
+    "Semantic cache searches by result (match above threshold, none).",
+    labelnames=("result",),
+)
+SEMANTIC_CACHE_SCORES = Histogram(
+    "voicebot_semantic_cache_best_score",
+    "Cosine similarity of the nearest cached question.",
+    (0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0),
+)
+FILLER_CLIPS = Counter(
+    "voicebot_filler_clips",
+    "Filler clips played while waiting for an answer, by how they ended (crossfaded, finished).",
+    labelnames=("outcome",),
+)
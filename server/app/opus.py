@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from .metrics import OPUS_ENCODE_SECONDS
+
+try:
+    import opuslib
+except ImportError:  # optional dependency: responses fall back to raw PCM
+    opuslib = None
+
+
+# ---------------------------------------------------------------------
+#   OPUS SETTINGS
+# ---------------------------------------------------------------------
+
+OPUS_BITRATE = int(os.environ.get("OPUS_BITRATE", "32000"))
+OPUS_WORKERS = int(os.environ.get("OPUS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Packet durations Opus can encode, in tenths of a millisecond
+_FRAME_TENTHS_MS = (25, 50, 100, 200, 400, 600)
+
+# Encoding is CPU-bound, so it runs off the event loop on a shared pool
+_executor = ThreadPoolExecutor(max_workers=OPUS_WORKERS, thread_name_prefix="opus")
+
+
+def opus_available() -> bool:
+    return opuslib is not None
+
+
+# ---------------------------------------------------------------------
+#   STREAMING ENCODER
+# ---------------------------------------------------------------------
+
+class OpusEncoder:
+    """Encodes mono Int16 PCM into Opus packets, one stream per connection.
+
+    ``encode()`` splits its input into packets of the durations Opus
+    supports, largest first. A remainder shorter than 2.5 ms is carried over
+    to the next call; only ``final=True`` (end of an answer) pads it with
+    silence. Calls must not overlap, since state carries from one to the next.
+    """
+
+    def __init__(self, sample_rate: int, bitrate: int = OPUS_BITRATE):
+        if opuslib is None:
+            raise RuntimeError("Opus egress needs the 'opuslib' package")
+        self.sample_rate = sample_rate
+        self._encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self.bitrate = bitrate
+        # Packet sizes in samples, largest first
+        self._sizes = [sample_rate * tenths // 10000 for tenths in reversed(_FRAME_TENTHS_MS)]
+        self._rest = b""    # PCM too short for a packet, sent with the next call
+
+    @property
+    def bitrate(self) -> int:
+        return self._bitrate
+
+    @bitrate.setter
+    def bitrate(self, value: int) -> None:
+        self._bitrate = value
+        self._encoder.bitrate = value
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._rest)
+
+    def encode_sync(self, pcm: bytes, final: bool = False) -> List[bytes]:
+        pcm = self._rest + pcm
+        packets: List[bytes] = []
+        start = 0
+        while start + 1 < len(pcm):
+            left = (len(pcm) - start) // 2
+            samples = next((n for n in self._sizes if n <= left), None)
+            if samples is None:
+                if not final:
+                    break
+                samples = self._sizes[-1]    # end of the answer: pad the tail
+            chunk = pcm[start:start + samples * 2].ljust(samples * 2, b"\x00")
+            packets.append(self._encoder.encode(chunk, samples))
+            start += samples * 2
+        self._rest = b"" if final else pcm[start:]
+        return packets
+
+    async def encode(self, pcm: bytes, final: bool = False) -> List[bytes]:
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        packets = await loop.run_in_executor(_executor, self.encode_sync, pcm, final)
+        OPUS_ENCODE_SECONDS.observe(time.perf_counter() - started)
+        return packets
@@ -0,0 +1,133 @@
+import json
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import msgpack
+except ImportError:  # optional dependency: control messages stay JSON text
+    msgpack = None
+
+
+# ---------------------------------------------------------------------
+#   CONTROL PROTOCOL
+# ---------------------------------------------------------------------
+#   Client -> server control messages are objects with a "type"
+#   discriminator and an optional protocol version "v":
+#
+#     {"type": "config", "v": 1, "userName": "Ana", ...}
+#     {"type": "end_turn"}     {"type": "interrupt"}
+#     {"type": "ping", "id": 7}     {"type": "stats"}
+#
+#   They arrive as JSON text frames or, once a config has asked for
+#   "framing": "tagged", as msgpack in binary frames. Tagged binary frames
+#   start with one kind byte: KIND_AUDIO or KIND_CONTROL. The legacy
+#   plain-text "END_TURN" and "INTERRUPT" messages are still accepted.
+
+PROTOCOL_VERSION = 1
+
+KIND_AUDIO = 0x01
+KIND_CONTROL = 0x02
+
+FRAMINGS = ("raw", "tagged")
+
+_LEGACY = {
+    "END_TURN": {"type": "end_turn"},
+    "INTERRUPT": {"type": "interrupt"},
+}
+
+
+class ProtocolError(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+# --------------------------
+#   SCHEMAS
+# --------------------------
+#   Field name -> accepted Python types. Every field is optional; unknown
+#   fields are ignored so newer clients can talk to older servers.
+
+_STR = (str,)
+_INT = (int,)
+_BOOL = (bool,)
+_LIST = (list,)
+
+SCHEMAS: Dict[str, Dict[str, Tuple[type, ...]]] = {
+    "config": {
+        "userName": _STR + (type(None),),
+        "vad": _BOOL,
+        "codecs": _LIST,
+        "inputFormat": _STR,
+        "sampleRate": _INT,
+        "channels": _INT,
+        "framing": _STR,
+    },
+    "end_turn": {},
+    "interrupt": {},
+    "ping": {"id": _INT + _STR},
+    "stats": {},
+}
+
+Validator = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def _compile(name: str, fields: Dict[str, Tuple[type, ...]]) -> Validator:
+    checks = tuple(fields.items())
+
+    def validate(msg: Dict[str, Any]) -> Dict[str, Any]:
+        for field, types in checks:
+            if field in msg:
+                value = msg[field]
+                # bool is an int subclass; only accept it where asked for
+                if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                    raise ProtocolError(f"{name}.{field}: expected {'/'.join(t.__name__ for t in types)}")
+        return msg
+
+    return validate
+
+
+VALIDATORS: Dict[str, Validator] = {name: _compile(name, fields) for name, fields in SCHEMAS.items()}
+
+
+# --------------------------
+#   PARSING
+# --------------------------
+
+def validate(msg: Any) -> Dict[str, Any]:
+    if not isinstance(msg, dict):
+        raise ProtocolError("message must be an object")
+
+    version = msg.get("v", PROTOCOL_VERSION)
+    if not isinstance(version, int) or isinstance(version, bool) or version > PROTOCOL_VERSION:
+        raise ProtocolError(f"unsupported protocol version: {version!r}")
+
+    validator = VALIDATORS.get(msg.get("type"))
+    if validator is None:
+        raise ProtocolError(f"unknown message type: {msg.get('type')!r}")
+    return validator(msg)
+
+
+def parse_text(text: str) -> Dict[str, Any]:
+    legacy = _LEGACY.get(text)
+    if legacy is not None:
+        return legacy
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        raise ProtocolError("invalid JSON") from None
+    return validate(msg)
+
+
+def parse_control(payload: bytes) -> Dict[str, Any]:
+    """Decode the body of a ``KIND_CONTROL`` binary frame."""
+    if msgpack is None:
+        raise ProtocolError("msgpack control frames are not supported by this server")
+    try:
+        msg = msgpack.unpackb(payload, raw=False)
+    except Exception:
+        raise ProtocolError("invalid msgpack") from None
+    return validate(msg)
@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from .answer_cache import ANSWER_CACHE_DIR, ANSWER_CACHE_TTL_S
+from .logs import get_logger, log_event
+from .metrics import SEMANTIC_CACHE_SCORES, SEMANTIC_CACHE_SEARCHES
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: the on-disk index is then single-process
+    fcntl = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # optional dependency: no semantic cache unless "hash" is chosen
+    SentenceTransformer = None
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------------------------
+#   SEMANTIC CACHE SETTINGS
+# ---------------------------------------------------------------------
+#   Questions that miss the exact answer cache are embedded and matched
+#   against earlier questions with the same persona and language. A
+#   neighbour above the similarity threshold answers from the cache.
+
+SEMANTIC_CACHE = os.environ.get("SEMANTIC_CACHE", "1") == "1"
+# A sentence-transformers model, or "hash" for the built-in embedder, which
+# only matches near-verbatim rewordings
+SEMANTIC_CACHE_MODEL = os.environ.get("SEMANTIC_CACHE_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+# Cosine similarity needed for a hit; empty = the embedder's default
+SEMANTIC_CACHE_THRESHOLD = os.environ.get("SEMANTIC_CACHE_THRESHOLD", "")
+SEMANTIC_CACHE_MAX_ROWS = int(os.environ.get("SEMANTIC_CACHE_MAX_ROWS", "200000"))
+# Below this many rows every vector is scored; above it an IVF index is used
+SEMANTIC_IVF_MIN_ROWS = int(os.environ.get("SEMANTIC_IVF_MIN_ROWS", "20000"))
+SEMANTIC_IVF_NPROBE = int(os.environ.get("SEMANTIC_IVF_NPROBE", "8"))
+
+# Embedding and search are CPU-bound; one thread also serializes index updates
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic")
+
+
+def semantic_available(model: str = SEMANTIC_CACHE_MODEL) -> bool:
+    return model == "hash" or SentenceTransformer is not None
+
+
+def scope_id(persona: str, language: str) -> int:
+    """64-bit id of the (persona, language) pair a row may be matched within."""
+    digest = hashlib.blake2b(f"{persona}\0{language}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+# ---------------------------------------------------------------------
+#   EMBEDDERS
+# ---------------------------------------------------------------------
+
+_WORD = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Dependency-free sentence vector from hashed word and character n-grams.
+
+    Word unigrams and bigrams plus character trigrams of each word are
+    hashed (with a stable hash, so every worker agrees) into ``dim``
+    signed buckets and L2-normalized. It only catches rewordings that
+    share nearly all their words ("um, how do I ..."); "enable" and
+    "disable" versions of a question already score around 0.88, hence
+    the strict threshold.
+    """
+
+    threshold = 0.92
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hash{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.casefold())
+        feats = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            feats.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return feats
+
+    def embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feat in self._features(text):
+            h = zlib.crc32(feat.encode())
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class SentenceEmbedder:
+    """A sentence-transformers model run on the CPU."""
+
+    threshold = 0.9
+
+    def __init__(self, model: str):
+        self._model = SentenceTransformer(model, device="cpu")
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = re.sub(r"\W+", "-", model).strip("-") + f"-{self.dim}"
+
+    def embed(self, text: str) -> np.ndarray:
+        return self._model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def create_embedder(model: str = SEMANTIC_CACHE_MODEL):
+    if model == "hash":
+        return HashingEmbedder()
+    if SentenceTransformer is None:
+        raise RuntimeError("The semantic cache needs 'sentence-transformers' or SEMANTIC_CACHE_MODEL=hash")
+    embedder = SentenceEmbedder(model)
+    log_event(logger, "semantic_model_loaded", model=model, dim=embedder.dim)
+    return embedder
+
+
+# ---------------------------------------------------------------------
+#   VECTOR INDEX
+# ---------------------------------------------------------------------
+
+ROW_DTYPE = np.dtype([("created", "<f8"), ("scope", "<u8"), ("key", "u1", (32,))])
+
+
+class VectorIndex:
+    """Append-only vectors with a row of metadata each, searched by cosine.
+
+    With a ``directory`` the vectors (``<name>.f32``, N x dim float32) and
+    rows (``<name>.rows``) are files that are appended to under an
+    exclusive lock and read through ``np.memmap``. Every worker maps the
+    same pages, and a restart is ready without re-embedding anything.
+    Rows appended by other workers are picked up on the next search.
+
+    Up to ``ivf_min_rows`` every vector is scored. Past that, k-means
+    centroids are trained over the rows seen so far (again whenever the
+    index has doubled). A search then only scores the ``nprobe`` nearest
+    lists plus the rows added since training.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        name: str,
+        directory: str = "",
+        max_rows: int = SEMANTIC_CACHE_MAX_ROWS,
+        ivf_min_rows: int = SEMANTIC_IVF_MIN_ROWS,
+        nprobe: int = SEMANTIC_IVF_NPROBE,
+    ):
+        self.dim = dim
+        self.max_rows = max_rows
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+
+        self._vec_path = os.path.join(directory, f"{name}.f32") if directory else ""
+        self._row_path = os.path.join(directory, f"{name}.rows") if directory else ""
+        self._stat: Tuple[int, int] = (0, 0)
+        self._vecs = np.empty((0, dim), dtype=np.float32)
+        self._rows = np.empty(0, dtype=ROW_DTYPE)
+        self.n = 0
+
+        # IVF state: centroids, row ids grouped by list and list boundaries
+        self._centroids: Optional[np.ndarray] = None
+        self._order = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._trained = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._refresh()
+
+    # --------------------------
+    #   STORAGE
+    # --------------------------
+    def _refresh(self) -> None:
+        """Re-map the files if another worker has appended to them."""
+        try:
+            vs, rs = os.stat(self._vec_path).st_size, os.stat(self._row_path).st_size
+        except FileNotFoundError:
+            return
+        if (vs, rs) == self._stat:
+            return
+        self._stat = (vs, rs)
+        # A row is only complete once both its vector and metadata are in
+        n = min(vs // (4 * self.dim), rs // ROW_DTYPE.itemsize)
+        if n:
+            self._vecs = np.memmap(self._vec_path, np.float32, "r", shape=(n, self.dim))
+            self._rows = np.memmap(self._row_path, ROW_DTYPE, "r", shape=(n,))
+        self.n = n
+
+    def add(self, vec: np.ndarray, scope: int, key: str) -> None:
+        self._refresh()
+        if self.n >= self.max_rows:
+            return
+        row = np.zeros(1, dtype=ROW_DTYPE)
+        row["created"], row["scope"] = time.time(), scope
+        row["key"][0] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+
+        if not self._vec_path:
+            if self.n == len(self._rows):
+                cap = max(64, 2 * self.n)
+                self._vecs = np.resize(self._vecs, (cap, self.dim))
+                self._rows = np.resize(self._rows, cap)
+            self._vecs[self.n] = vec
+            self._rows[self.n] = row[0]
+            self.n += 1
+        else:
+            rows = os.open(self._row_path, os.O_RDWR | os.O_CREAT, 0o644)
+            vecs = os.open(self._vec_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(rows, fcntl.LOCK_EX)
+                # Sizes as of now, under the lock. A half-written row left
+                # by a crashed writer lies past the last complete one, where
+                # no reader maps it, so it is simply written over. The
+                # files never shrink: other workers have them mapped.
+                vs, rs = os.fstat(vecs).st_size, os.fstat(rows).st_size
+                n = min(vs // (4 * self.dim), rs // ROW_DTYPE.itemsize)
+                os.pwrite(vecs, vec.astype(np.float32).tobytes(), n * 4 * self.dim)
+                os.pwrite(rows, row.tobytes(), n * ROW_DTYPE.itemsize)
+            finally:
+                os.close(vecs)
+                os.close(rows)    # releases the lock
+            self._refresh()
+        self._maybe_train()
+
+    # --------------------------
+    #   SEARCH
+    # --------------------------
+    def search(self, vec: np.ndarray, scope: int, max_age: float) -> Tuple[Optional[str], float]:
+        """Best row in ``scope`` newer than ``max_age``: ``(key, score)``."""
+        if self._vec_path:
+            self._refresh()
+            self._maybe_train()
+        if not self.n:
+            return None, 0.0
+
+        ids = self._candidates(vec)
+        vecs = self._vecs[:self.n] if ids is None else self._vecs[ids]
+        rows = self._rows[:self.n] if ids is None else self._rows[ids]
+
+        scores = vecs @ vec
+        scores[(rows["scope"] != scope) | (rows["created"] < time.time() - max_age)] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return None, 0.0
+        return bytes(rows["key"][best]).hex(), float(scores[best])
+
+    def _candidates(self, vec: np.ndarray) -> Optional[np.ndarray]:
+        if self._centroids is None:
+            return None
+        lists = np.argsort(self._centroids @ vec)[-self.nprobe:]
+        parts = [self._order[self._offsets[c]:self._offsets[c + 1]] for c in lists]
+        parts.append(np.arange(self._trained, self.n))
+        return np.concatenate(parts)
+
+    def _maybe_train(self) -> None:
+        if self.n >= self.ivf_min_rows and self.n >= 2 * self._trained:
+            self._train()
+
+    def _train(self, iterations: int = 10) -> None:
+        n = self.n
+        nlist = max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(0)
+        sample = self._vecs[np.sort(rng.choice(n, min(n, 64 * nlist), replace=False))]
+
+        # Spherical k-means: assign by cosine, re-normalize the means
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    centroids[c] = mean / (np.linalg.norm(mean) or 1.0)
+
+        assign = np.concatenate([
+            np.argmax(self._vecs[start:min(n, start + 65536)] @ centroids.T, axis=1)
+            for start in range(0, n, 65536)
+        ])
+        self._order = np.argsort(assign, kind="stable")
+        self._offsets = np.searchsorted(assign[self._order], np.arange(nlist + 1))
+        self._centroids = centroids
+        self._trained = n
+        log_event(logger, "semantic_index_trained", rows=n, lists=nlist)
+
+
+# ---------------------------------------------------------------------
+#   SEMANTIC CACHE
+# ---------------------------------------------------------------------
+
+class SemanticCache:
+    """Maps a question to the answer-cache key of a similar earlier question.
+
+    Only keys are kept here; the answers themselves live in the
+    ``AnswerCache``, so eviction and TTL there apply to semantic hits too.
+    Index files go in ``<ANSWER_CACHE_DIR>/semantic`` when that is set.
+    """
+
+    def __init__(self, embedder=None, threshold: Optional[float] = None, directory: str = ANSWER_CACHE_DIR):
+        self.embedder = embedder or create_embedder()
+        if threshold is None:
+            threshold = float(SEMANTIC_CACHE_THRESHOLD) if SEMANTIC_CACHE_THRESHOLD else self.embedder.threshold
+        self.threshold = threshold
+        self._writes: Set[asyncio.Task] = set()
+        self.index = VectorIndex(
+            self.embedder.dim,
+            self.embedder.name,
+            os.path.join(directory, "semantic") if directory else "",
+        )
+
+    async def find(self, question: str, persona: str, language: str) -> Optional[str]:
+        if not question:
+            return None
+        loop = asyncio.get_running_loop()
+        key, score = await loop.run_in_executor(_executor, self._find, question, scope_id(persona, language))
+        if key is not None:
+            SEMANTIC_CACHE_SCORES.observe(score)
+        hit = key is not None and score >= self.threshold
+        SEMANTIC_CACHE_SEARCHES.inc(result="match" if hit else "none")
+        return key if hit else None
+
+    def _find(self, question: str, scope: int) -> Tuple[Optional[str], float]:
+        return self.index.search(self.embedder.embed(question), scope, ANSWER_CACHE_TTL_S)
+
+    def add(self, question: str, persona: str, language: str, key: str) -> None:
+        """Index ``question`` in the background; ``key`` is its answer-cache key."""
+        task = asyncio.create_task(self._save(question, scope_id(persona, language), key))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _save(self, question: str, scope: int, key: str) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(_executor, self._add, question, scope, key)
+        except OSError as e:
+            log_event(logger, "semantic_cache_write_failed", logging.WARNING, error=str(e))
+
+    def _add(self, question: str, scope: int, key: str) -> None:
+        self.index.add(self.embedder.embed(question), scope, key)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, List, Optional, Set, Tuple
+
+from .live_session import close_session, open_session
+from .logs import get_logger, log_event
+from .metrics import POOL_IDLE_SESSIONS, POOL_TAKES
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------------------------
+#   POOL SETTINGS
+# ---------------------------------------------------------------------
+
+LIVE_POOL_SIZE = int(os.environ.get("LIVE_POOL_SIZE", "2"))
+LIVE_POOL_MAX_AGE_S = float(os.environ.get("LIVE_POOL_MAX_AGE_S", "300"))
+LIVE_POOL_REFILL_INTERVAL_S = float(os.environ.get("LIVE_POOL_REFILL_INTERVAL_S", "5"))
+
+
+class _Idle:
+    def __init__(self, cm: Any, session: Any):
+        self.cm = cm
+        self.session = session
+        self.created = time.monotonic()
+
+
+# ---------------------------------------------------------------------
+#   PRE-WARMED LIVE SESSIONS
+# ---------------------------------------------------------------------
+
+class LiveSessionPool:
+    """Keeps ``size`` idle Live sessions open with the base configuration.
+
+    A background task evicts sessions older than ``max_age`` (upstream
+    sessions have a limited lifetime) and tops the pool back up every
+    ``interval`` seconds, or immediately after a session is taken.
+    """
+
+    def __init__(
+        self,
+        backend,
+        model: str,
+        config: dict,
+        size: int = LIVE_POOL_SIZE,
+        max_age: float = LIVE_POOL_MAX_AGE_S,
+        interval: float = LIVE_POOL_REFILL_INTERVAL_S,
+    ):
+        self.backend = backend
+        self.model = model
+        self.config = config
+        self.size = size
+        self.max_age = max_age
+        self.interval = interval
+
+        self._idle: List[_Idle] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def start(self) -> None:
+        if self.size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        idle, self._idle = self._idle, []
+        POOL_IDLE_SESSIONS.set(0)
+        await asyncio.gather(*(close_session(s.cm) for s in idle))
+
+    def take(self) -> Optional[Tuple[Any, Any]]:
+        """Newest fresh idle session as ``(context_manager, session)``, if any."""
+        now = time.monotonic()
+        while self._idle:
+            entry = self._idle.pop()
+            if now - entry.created < self.max_age:
+                POOL_TAKES.inc(result="hit")
+                POOL_IDLE_SESSIONS.set(len(self._idle))
+                self._wake.set()
+                return entry.cm, entry.session
+            self._close_later(entry)
+
+        POOL_TAKES.inc(result="miss")
+        POOL_IDLE_SESSIONS.set(0)
+        self._wake.set()
+        return None
+
+    async def _maintain(self) -> None:
+        while True:
+            self._wake.clear()
+            self._evict_stale()
+
+            missing = self.size - len(self._idle)
+            if missing > 0:
+                results = await asyncio.gather(
+                    *(open_session(self.backend, self.model, self.config) for _ in range(missing)),
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        log_event(logger, "pool_connect_failed", logging.WARNING, error=str(result))
+                    else:
+                        self._idle.append(_Idle(*result))
+                POOL_IDLE_SESSIONS.set(len(self._idle))
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _close_later(self, entry: _Idle) -> None:
+        task = asyncio.create_task(close_session(entry.cm))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _evict_stale(self) -> None:
+        now = time.monotonic()
+        fresh = [s for s in self._idle if now - s.created < self.max_age]
+        for entry in self._idle:
+            if entry not in fresh:
+                self._close_later(entry)
+        if len(fresh) != len(self._idle):
+            log_event(logger, "pool_evicted", count=len(self._idle) - len(fresh))
+        self._idle = fresh
+        POOL_IDLE_SESSIONS.set(len(self._idle))
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+
+# ---------------------------------------------------------------------
+#   TRANSCRIPT SETTINGS
+# ---------------------------------------------------------------------
+#   Transcription deltas from the Live API are forwarded to the client as
+#   JSON text frames between the audio frames:
+#
+#     {"type":"input_transcript","text":"how do I"}
+#     {"type":"output_transcript","text":"Turn on Block","final":true}
+#     {"type":"model_text","text":"..."}
+#
+#   "text" is a delta to append to what came before for the same type.
+#   Deltas arriving faster than TRANSCRIPT_INTERVAL_MS are merged.
+
+TRANSCRIPTS = os.environ.get("TRANSCRIPTS", "1") == "1"
+TRANSCRIPT_INTERVAL_MS = int(os.environ.get("TRANSCRIPT_INTERVAL_MS", "100"))
+# Log each turn's question and answer text (event "turn_transcript")
+TRANSCRIPT_LOG = os.environ.get("TRANSCRIPT_LOG", "0") == "1"
+
+INPUT_TRANSCRIPT = "input_transcript"
+OUTPUT_TRANSCRIPT = "output_transcript"
+MODEL_TEXT = "model_text"
+
+
+class TranscriptStream:
+    """Rate-limited transcript messages for one call.
+
+    The first delta after a quiet period goes out at once; later ones are
+    held and merged until ``interval_ms`` has passed since the last send.
+    One loop timer does the delayed flush, so audio frames are never held
+    back. ``flush()`` sends everything pending, e.g. at the end of a turn.
+    With ``send=False`` nothing is sent, but the language and whole-turn
+    text are still tracked.
+    """
+
+    def __init__(self, egress, interval_ms: int = TRANSCRIPT_INTERVAL_MS, send: bool = TRANSCRIPTS):
+        self.egress = egress
+        self.interval = interval_ms / 1000
+        self.send = send
+        self.language = ""    # as detected in the caller's speech
+
+        self._pending: Dict[str, List[str]] = {}
+        self._final: Set[str] = set()
+        self._last = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Whole-turn text, for the answer cache and logs
+        self.heard: List[str] = []
+        self.said: List[str] = []
+
+    def on_message(self, response) -> None:
+        content = getattr(response, "server_content", None)
+        if content is None:
+            return
+        heard, said = content.input_transcription, content.output_transcription
+        if heard is not None:
+            self.language = heard.language_code or self.language
+            self.heard.append(heard.text or "")
+            self.add(INPUT_TRANSCRIPT, heard.text, bool(heard.finished))
+        if said is not None:
+            self.said.append(said.text or "")
+            self.add(OUTPUT_TRANSCRIPT, said.text, bool(said.finished))
+        if content.model_turn is not None:
+            for part in content.model_turn.parts or ():
+                if part.text and not part.thought:
+                    self.add(MODEL_TEXT, part.text)
+
+    def add(self, kind: str, text: Optional[str], final: bool = False) -> None:
+        if not self.send:
+            return
+        if text:
+            self._pending.setdefault(kind, []).append(text)
+        if final:
+            self._final.add(kind)
+        if not self._pending and not self._final:
+            return
+
+        loop = asyncio.get_running_loop()
+        wait = self._last + self.interval - loop.time()
+        if wait <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(wait, self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for kind in list(self._pending) + [k for k in self._final if k not in self._pending]:
+            msg = {"type": kind, "text": "".join(self._pending.get(kind, ()))}
+            if kind in self._final:
+                msg["final"] = True
+            self.egress.send_text(json.dumps(msg, separators=(",", ":"), ensure_ascii=False))
+        self._pending.clear()
+        self._final.clear()
+        self._last = asyncio.get_running_loop().time()
+
+    def new_turn(self) -> None:
+        self.heard.clear()
+        self.said.clear()
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,111 @@
+import os
+from typing import List
+
+from .audio import INPUT_SAMPLE_RATE
+from .metrics import TURN_BUFFER_BYTES
+
+
+# ---------------------------------------------------------------------
+#   TURN BUFFER SETTINGS
+# ---------------------------------------------------------------------
+
+# Longest user turn kept; the turn is ended when its buffer is full
+MAX_TURN_SECONDS = float(os.environ.get("MAX_TURN_SECONDS", "60"))
+# Buffers start this large and double as needed, up to MAX_TURN_SECONDS
+TURN_BUFFER_INITIAL_SECONDS = float(os.environ.get("TURN_BUFFER_INITIAL_SECONDS", "5"))
+# Spare buffers a call keeps for its next turns
+TURN_BUFFERS_KEPT = 2
+
+
+def pcm_bytes(seconds: float, sample_rate: int = INPUT_SAMPLE_RATE) -> int:
+    return int(seconds * sample_rate) * 2
+
+
+# ---------------------------------------------------------------------
+#   PREALLOCATED TURN AUDIO
+# ---------------------------------------------------------------------
+
+class TurnBuffer:
+    """One turn of 16 kHz PCM in a single preallocated ``bytearray``.
+
+    ``append()`` copies into free space; nothing else is allocated per
+    frame. ``view()`` hands out zero-copy ``memoryview`` slices. The buffer
+    is never resized in place, because that fails while views are alive.
+    Growing allocates a new array twice the size and copies into it, up to
+    ``max_bytes``. After ``clear()`` the same storage serves the next turn.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = pcm_bytes(MAX_TURN_SECONDS),
+        initial_bytes: int = pcm_bytes(TURN_BUFFER_INITIAL_SECONDS),
+    ):
+        self.max_bytes = max_bytes
+        self._buf = bytearray(max(2, min(initial_bytes, max_bytes)))
+        self._len = 0
+        TURN_BUFFER_BYTES.inc(len(self._buf))
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    @property
+    def full(self) -> bool:
+        return self._len >= self.max_bytes
+
+    def append(self, data: bytes) -> int:
+        """Copy in as much of ``data`` as fits; returns the bytes taken."""
+        n = min(len(data), self.max_bytes - self._len)
+        if self._len + n > len(self._buf):
+            self._grow(self._len + n)
+        self._buf[self._len:self._len + n] = memoryview(data)[:n]
+        self._len += n
+        return n
+
+    def view(self, start: int = 0, end: int = -1) -> memoryview:
+        end = self._len if end < 0 else min(end, self._len)
+        return memoryview(self._buf)[start:end]
+
+    def clear(self) -> None:
+        self._len = 0
+
+    def release(self) -> None:
+        TURN_BUFFER_BYTES.dec(len(self._buf))
+        self._buf = bytearray()
+        self._len = 0
+
+    def _grow(self, needed: int) -> None:
+        size = len(self._buf)
+        while size < needed:
+            size *= 2
+        size = min(size, self.max_bytes)
+        buf = bytearray(size)
+        buf[:self._len] = memoryview(self._buf)[:self._len]
+        TURN_BUFFER_BYTES.inc(size - len(self._buf))
+        self._buf = buf
+
+
+class TurnBufferPool:
+    """Per-call free list, so turns reuse storage instead of reallocating."""
+
+    def __init__(self, keep: int = TURN_BUFFERS_KEPT):
+        self.keep = keep
+        self._free: List[TurnBuffer] = []
+
+    def take(self) -> TurnBuffer:
+        return self._free.pop() if self._free else TurnBuffer()
+
+    def give(self, buffer: TurnBuffer) -> None:
+        buffer.clear()
+        if len(self._free) < self.keep:
+            self._free.append(buffer)
+        else:
+            buffer.release()
+
+    def close(self) -> None:
+        for buffer in self._free:
+            buffer.release()
+        self._free.clear()
@@ -0,0 +1,110 @@
+import os
+from typing import List
+
+import numpy as np
+
+from .audio import frame_dbfs
+
+
+# ---------------------------------------------------------------------
+#   VAD SETTINGS
+# ---------------------------------------------------------------------
+
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "0") == "1"
+VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", "-45"))
+VAD_MARGIN_DB = float(os.environ.get("VAD_MARGIN_DB", "10"))
+VAD_START_MS = int(os.environ.get("VAD_START_MS", "60"))
+VAD_SILENCE_MS = int(os.environ.get("VAD_SILENCE_MS", "800"))
+VAD_NO_SPEECH_MS = int(os.environ.get("VAD_NO_SPEECH_MS", "10000"))
+
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+NO_SPEECH = "no_speech"
+
+
+# ---------------------------------------------------------------------
+#   ENERGY-BASED VAD (16 kHz PCM Int16)
+# ---------------------------------------------------------------------
+
+class EnergyVAD:
+    """Energy VAD with an adaptive noise floor for 16 kHz mono Int16 PCM.
+
+    ``process()`` takes raw frames as they arrive from the client and returns
+    the decisions taken on them: ``speech_start`` once enough consecutive
+    voiced blocks are seen, ``speech_end`` after ``silence_ms`` of silence
+    following speech, and ``no_speech`` if nobody talks for ``no_speech_ms``
+    (never, with ``no_speech_ms=0``).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        block_ms: int = 20,
+        threshold_db: float = VAD_THRESHOLD_DB,
+        margin_db: float = VAD_MARGIN_DB,
+        start_ms: int = VAD_START_MS,
+        silence_ms: int = VAD_SILENCE_MS,
+        no_speech_ms: int = VAD_NO_SPEECH_MS,
+    ):
+        self.block_len = sample_rate * block_ms // 1000
+        self.block_ms = block_ms
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.start_blocks = max(1, start_ms // block_ms)
+        self.silence_blocks = max(1, silence_ms // block_ms)
+        self.no_speech_blocks = max(1, no_speech_ms // block_ms) if no_speech_ms else None
+        self.reset()
+
+    def reset(self) -> None:
+        self._pending = np.empty(0, dtype=np.int16)
+        self.noise_floor_db = self.threshold_db - self.margin_db
+        self.in_speech = False
+        self.spoke = False
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._blocks = 0
+        self.ended = False
+
+    def process(self, pcm: bytes) -> List[str]:
+        if self.ended:
+            return []
+
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+
+        levels = frame_dbfs(samples, self.block_len)
+        self._pending = samples[len(levels) * self.block_len:].copy()
+
+        events: List[str] = []
+        for level in levels.tolist():
+            self._blocks += 1
+            voiced = level > max(self.threshold_db, self.noise_floor_db + self.margin_db)
+
+            if voiced:
+                self._voiced_run += 1
+                self._silent_run = 0
+            else:
+                self._voiced_run = 0
+                self._silent_run += 1
+                # Track the floor quickly downwards, slowly upwards
+                rate = 0.3 if level < self.noise_floor_db else 0.02
+                self.noise_floor_db += rate * (level - self.noise_floor_db)
+
+            if not self.in_speech and self._voiced_run >= self.start_blocks:
+                self.in_speech = True
+                self.spoke = True
+                events.append(SPEECH_START)
+
+            elif self.in_speech and self._silent_run >= self.silence_blocks:
+                self.in_speech = False
+                self.ended = True
+                events.append(SPEECH_END)
+                break
+
+            elif not self.spoke and self.no_speech_blocks and self._blocks >= self.no_speech_blocks:
+                self.ended = True
+                events.append(NO_SPEECH)
+                break
+
+        return events
@@ -0,0 +1,251 @@
+"""Concurrent WebSocket load generator for ``/ws/live-audio``.
+
+Every simulated caller sends a ``config`` message, streams 16 kHz PCM Int16
+in the same 4096-sample frames ``VoiceBotUI.tsx`` produces, sends
+``END_TURN`` and measures time to first audio, total turn time and response
+throughput. Results are printed as p50/p95/p99 and written as JSON so
+server versions can be compared.
+
+    python server/bench/ws_load.py --clients 50 --turns 3 --output results.json
+    python server/bench/ws_load.py --fixture question.wav --label v2
+
+Run the server with ``LIVE_BACKEND=fake`` to benchmark without Gemini.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import struct
+import sys
+import time
+import wave
+from typing import Dict, List, Optional
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - optional benchmark dependency
+    websockets = None
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 4096          # ScriptProcessorNode buffer size used by the client
+RESPONSE_SAMPLE_RATE = 24000
+
+
+# ---------------------------------------------------------------------
+#   FIXTURES
+# ---------------------------------------------------------------------
+
+def load_fixture(path: str) -> bytes:
+    """Load 16 kHz mono Int16 PCM from a ``.wav`` or raw ``.pcm`` file."""
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as w:
+            if w.getframerate() != SAMPLE_RATE or w.getnchannels() != 1 or w.getsampwidth() != 2:
+                raise SystemExit(f"{path}: expected 16 kHz mono 16-bit WAV")
+            return w.readframes(w.getnframes())
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def synthetic_question(seconds: float = 2.0, seed: int = 0) -> bytes:
+    """Speech-like bursts with a little silence either side."""
+    rng = random.Random(seed)
+    n = int(seconds * SAMPLE_RATE)
+    lead = SAMPLE_RATE // 4
+    samples = []
+    for i in range(n):
+        if lead <= i < n - lead:
+            envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * i / SAMPLE_RATE)
+            value = envelope * 6000 * math.sin(2 * math.pi * 180 * i / SAMPLE_RATE)
+        else:
+            value = 0.0
+        samples.append(int(value + rng.gauss(0, 40)))
+    return struct.pack(f"<{n}h", *samples)
+
+
+def frames(pcm: bytes, frame_samples: int = FRAME_SAMPLES) -> List[bytes]:
+    size = frame_samples * 2
+    return [pcm[i:i + size] for i in range(0, len(pcm), size)]
+
+
+# ---------------------------------------------------------------------
+#   ONE SIMULATED CALLER
+# ---------------------------------------------------------------------
+
+async def run_client(client_id: int, args: argparse.Namespace, fixtures: List[bytes], records: List[Dict]) -> None:
+    await asyncio.sleep(client_id * args.ramp)
+
+    try:
+        async with websockets.connect(args.url, max_size=None) as ws:
+            await ws.send(json.dumps({"type": "config", "userName": f"{args.user_name}{client_id}"}))
+
+            for turn in range(args.turns):
+                pcm = fixtures[(client_id + turn) % len(fixtures)]
+                records.append(await run_turn(ws, client_id, turn, pcm, args))
+    except Exception as e:
+        records.append({"client": client_id, "turn": None, "ok": False, "error": f"connect: {e}"})
+
+
+async def run_turn(ws, client_id: int, turn: int, pcm: bytes, args: argparse.Namespace) -> Dict:
+    frame_seconds = args.frame_samples / SAMPLE_RATE
+    started = time.perf_counter()
+
+    for frame in frames(pcm, args.frame_samples):
+        await ws.send(frame)
+        if args.realtime:
+            await asyncio.sleep(frame_seconds)
+
+    await ws.send("END_TURN")
+    end_of_turn = time.perf_counter()
+
+    first_audio: Optional[float] = None
+    bytes_in = 0
+    outcome = "timeout"
+    deadline = end_of_turn + args.timeout
+
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        try:
+            message = await asyncio.wait_for(ws.recv(), remaining)
+        except asyncio.TimeoutError:
+            break
+
+        if isinstance(message, bytes):
+            if first_audio is None:
+                first_audio = time.perf_counter()
+            bytes_in += len(message)
+        elif message == "RESPONSE_COMPLETE":
+            outcome = "ok"
+            break
+        elif message == "ERROR":
+            outcome = "error"
+            break
+
+    done = time.perf_counter()
+    stream_seconds = done - first_audio if first_audio else 0.0
+    audio_seconds = bytes_in / 2 / RESPONSE_SAMPLE_RATE
+
+    return {
+        "client": client_id,
+        "turn": turn,
+        "ok": outcome == "ok",
+        "outcome": outcome,
+        "upload_s": round(end_of_turn - started, 4),
+        "ttfa_s": round(first_audio - end_of_turn, 4) if first_audio else None,
+        "turn_s": round(done - end_of_turn, 4),
+        "bytes_in": bytes_in,
+        "audio_s": round(audio_seconds, 3),
+        "throughput_bps": round(bytes_in / stream_seconds) if stream_seconds > 0 else None,
+    }
+
+
+# ---------------------------------------------------------------------
+#   REPORTING
+# ---------------------------------------------------------------------
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 4) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def summarize(records: List[Dict], wall_seconds: float) -> Dict:
+    ok = [r for r in records if r.get("ok")]
+    outcomes: Dict[str, int] = {}
+    for r in records:
+        key = r.get("outcome") or "connect_error"
+        outcomes[key] = outcomes.get(key, 0) + 1
+
+    total_bytes = sum(r.get("bytes_in", 0) for r in records)
+    return {
+        "turns": len(records),
+        "ok": len(ok),
+        "outcomes": outcomes,
+        "wall_s": round(wall_seconds, 3),
+        "turns_per_s": round(len(ok) / wall_seconds, 3) if wall_seconds else None,
+        "response_bytes_per_s": round(total_bytes / wall_seconds) if wall_seconds else None,
+        "ttfa_s": distribution([r["ttfa_s"] for r in ok if r["ttfa_s"] is not None]),
+        "turn_s": distribution([r["turn_s"] for r in ok]),
+        "throughput_bps": distribution([r["throughput_bps"] for r in ok if r["throughput_bps"]]),
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    print(f"turns: {summary['turns']}  ok: {summary['ok']}  outcomes: {summary['outcomes']}")
+    print(f"wall: {summary['wall_s']} s  ok turns/s: {summary['turns_per_s']}")
+    for key in ("ttfa_s", "turn_s"):
+        d = summary[key]
+        if d["n"]:
+            print(f"{key:>8}: p50={d['p50']:.3f}  p95={d['p95']:.3f}  p99={d['p99']:.3f}  max={d['max']:.3f}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--url", default="ws://localhost:8000/ws/live-audio")
+    p.add_argument("--clients", type=int, default=10, help="concurrent callers")
+    p.add_argument("--turns", type=int, default=3, help="turns per caller")
+    p.add_argument("--fixture", action="append", default=[], help=".wav/.pcm file (16 kHz mono Int16), repeatable")
+    p.add_argument("--frame-samples", type=int, default=FRAME_SAMPLES)
+    p.add_argument("--no-realtime", dest="realtime", action="store_false", help="send frames as fast as possible")
+    p.add_argument("--ramp", type=float, default=0.05, help="seconds between caller starts")
+    p.add_argument("--timeout", type=float, default=60.0, help="per-turn response timeout")
+    p.add_argument("--user-name", default="bench")
+    p.add_argument("--label", default="", help="free-form label stored with the results")
+    p.add_argument("--output", help="write machine-readable results to this JSON file")
+    return p.parse_args(argv)
+
+
+async def main_async(args: argparse.Namespace) -> Dict:
+    fixtures = [load_fixture(path) for path in args.fixture] or [synthetic_question()]
+    records: List[Dict] = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(i, args, fixtures, records) for i in range(args.clients)))
+    wall = time.perf_counter() - started
+
+    return {
+        "label": args.label,
+        "timestamp": time.time(),
+        "host": platform.node(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "summary": summarize(records, wall),
+        "records": sorted(records, key=lambda r: (r["client"], r["turn"] if r["turn"] is not None else -1)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if websockets is None:
+        print("ws_load.py needs the 'websockets' package: pip install websockets", file=sys.stderr)
+        return 2
+
+    args = parse_args(argv)
+    results = asyncio.run(main_async(args))
+    print_summary(results["summary"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+    return 0 if results["summary"]["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+import asyncio
+
+import numpy as np
+
+from app.admission import AdmissionController
+from app.call import VoiceCall
+from app.fake_live import FakeLiveBackend
+from app.live_session import LiveSessionManager
+from app.metrics import TURN_BUFFER_BYTES
+
+# 0.5 s of a loud tone, so neither the VAD nor the trimmer drops it
+SPEECH = (np.sin(np.arange(8000) / 5) * 8000).astype(np.int16).tobytes()
+
+
+def make_call(admission: AdmissionController) -> VoiceCall:
+    live = LiveSessionManager(FakeLiveBackend(connect_delay_ms=0, ttfb_ms=0), "fake", {})
+    return VoiceCall(None, live, lambda name: "", admission)
+
+
+def test_turn_cancelled_before_start_is_released():
+    async def scenario():
+        admission = AdmissionController(max_inflight=1)
+        buffers_before = TURN_BUFFER_BYTES.value()
+
+        call = make_call(admission)
+        await call._on_audio(SPEECH)
+        assert call.turn.admitted
+
+        # END_TURN immediately followed by INTERRUPT: the responder is
+        # cancelled before it ever runs
+        await call._end_turn()
+        await call.interrupt("client")
+        await asyncio.sleep(0)
+
+        assert admission.inflight == 0
+        call.buffers.give(call.turn.audio)
+        call.buffers.close()
+        await call.live.close()
+        assert TURN_BUFFER_BYTES.value() == buffers_before
+
+    asyncio.run(scenario())